@@ -0,0 +1,11 @@
+"""Data pipeline behind the Bremen population dashboard."""
+
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+RAW_DIR = ROOT_DIR / "data" / "raw"
+CACHE_DIR = ROOT_DIR / "data" / "cache"
+BOUNDARY_DIR = ROOT_DIR / "Verwaltungsgrenzen_HB_BHV"
+
+# GENESIS table of the raw files, see bremen.ingest
+TABLE = "12411-03-03"
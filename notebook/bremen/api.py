@@ -0,0 +1,229 @@
+"""Read-only HTTP API over the aggregates behind the dashboard.
+
+    python -m bremen.api --port 8000
+
+Routes, all answered as JSON records or, with ``?format=arrow`` or an
+``Accept: application/vnd.apache.arrow.stream`` header, as an Arrow IPC
+stream:
+
+    GET /years
+    GET /{year}/territories?level=Stadtteil
+    GET /{year}/summary?level=Stadtteil     totals, shares and median age
+                                            groups (the map table of a level)
+    GET /{year}/summary/{territory}         one territory of the summary
+    GET /{year}/ages/{territory}            its age groups with their shares
+
+Every response body is rendered once and kept in memory. Its ETag is
+derived from the sha256 of the raw file of the year (all years for
+``/years``) and its Last-Modified from that file's mtime, both taken from
+the catalog manifest, so conditional requests are answered with a 304.
+"""
+
+import argparse
+import hashlib
+import io
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+
+import pandas as pd
+import pyarrow as pa
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from .catalog import Catalog
+from .index import TerritoryIndex
+from .summary import UNIT_COLUMNS, map_table, with_percentages
+
+ARROW = "application/vnd.apache.arrow.stream"
+JSON = "application/json"
+
+CACHE_CONTROL = "no-cache"  # clients may keep responses, but revalidate them
+
+
+class Aggregates:
+    """The catalog loaded once, and every rendered response by request."""
+
+    def __init__(self, catalog: Catalog | None = None, max_entries: int = 10_000):
+        self.catalog = catalog or Catalog()
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def load(self):
+        self.catalog.refresh()
+        self.summary = self.catalog.load_summary()
+        self.index = TerritoryIndex(self.catalog.load_panel())
+        self.manifest = dict(self.catalog.manifest)
+        self._entries.clear()
+
+    def _version(self, year: str | None) -> tuple[str, float]:
+        """Content hash and mtime (seconds) of one year or all years."""
+        entries = self.manifest.values() if year is None else [self.manifest[year]]
+        sha = "".join(sorted(entry["sha256"] for entry in entries))
+        mtime = max(entry["mtime_ns"] for entry in entries) / 1e9
+        return sha, mtime
+
+    def get(self, key: tuple, year: str | None, build) -> tuple[bytes, dict]:
+        """Body and headers of ``key``, rendering it with ``build`` once."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        frame, media_type = build(), key[-1]
+        sha, mtime = self._version(year)
+        etag = hashlib.sha256(repr((sha, key)).encode()).hexdigest()[:32]
+        headers = {
+            "content-type": media_type,
+            "etag": f'"{etag}"',
+            "last-modified": formatdate(int(mtime), usegmt=True),
+            "cache-control": CACHE_CONTROL,
+            "vary": "Accept",
+        }
+        entry = (render(frame, media_type), headers)
+
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+
+def render(frame: pd.DataFrame, media_type: str) -> bytes:
+    if media_type == ARROW:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    return frame.to_json(orient="records", date_format="iso").encode()
+
+
+def is_fresh(request: Request, headers: dict) -> bool:
+    """Whether the copy named by the conditional headers is current."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or headers["etag"] in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["last-modified"]) <= since
+    return False
+
+
+def media_type(request: Request) -> str:
+    requested = request.query_params.get("format")
+    if requested is None:
+        return ARROW if ARROW in request.headers.get("accept", "") else JSON
+    if requested not in ("json", "arrow"):
+        raise HTTPException(400, f"unknown format {requested!r}")
+    return ARROW if requested == "arrow" else JSON
+
+
+def create_app(aggregates: Aggregates | None = None) -> Starlette:
+    aggregates = aggregates or Aggregates()
+
+    def respond(request: Request, key: tuple, year: str | None, build) -> Response:
+        if year is not None and year not in aggregates.manifest:
+            raise HTTPException(404, f"no data for {year}")
+        body, headers = aggregates.get(key + (media_type(request),), year, build)
+        if is_fresh(request, headers):
+            return Response(status_code=304, headers=headers)
+        return Response(body, headers=headers)
+
+    def level_of(request: Request) -> str | None:
+        level = request.query_params.get("level")
+        if level is not None and level not in UNIT_COLUMNS:
+            raise HTTPException(400, f"level must be one of {list(UNIT_COLUMNS)}")
+        return level
+
+    def territory_of(year: str, territory: str) -> str:
+        if (year, territory) not in aggregates.index.offsets:
+            raise HTTPException(404, f"no territory {territory!r} in {year}")
+        return territory
+
+    async def years(request):
+        return respond(
+            request,
+            ("years",),
+            None,
+            lambda: pd.DataFrame({"year": sorted(aggregates.manifest)}),
+        )
+
+    async def territories(request):
+        year, level = request.path_params["year"], level_of(request)
+
+        def build():
+            names = aggregates.index.territories(year)
+            if level is not None:
+                names = [name for name in names if f"({level})" in name]
+            return pd.DataFrame({"territorial_unit": names})
+
+        return respond(request, ("territories", year, level), year, build)
+
+    async def summary(request):
+        year, level = request.path_params["year"], level_of(request)
+
+        def build():
+            if level is not None:
+                return map_table(aggregates.summary, year, level)
+            return aggregates.summary.loc[year].reset_index()
+
+        return respond(request, ("summary", year, level), year, build)
+
+    async def territory_summary(request):
+        year = request.path_params["year"]
+        territory = request.path_params["territory"]
+
+        def build():
+            territory_of(year, territory)
+            return aggregates.summary.loc[[(year, territory)]].reset_index()
+
+        return respond(request, ("territory_summary", year, territory), year, build)
+
+    async def ages(request):
+        year = request.path_params["year"]
+        territory = request.path_params["territory"]
+
+        def build():
+            rows = aggregates.index.select(year, territory_of(year, territory))
+            return with_percentages(rows)
+
+        return respond(request, ("ages", year, territory), year, build)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        aggregates.load()
+        yield
+
+    return Starlette(
+        routes=[
+            Route("/years", years),
+            Route("/{year}/territories", territories),
+            Route("/{year}/summary", summary),
+            Route("/{year}/summary/{territory}", territory_summary),
+            Route("/{year}/ages/{territory}", ages),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the aggregates over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(), host=args.host, port=args.port, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
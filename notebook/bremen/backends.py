@@ -0,0 +1,324 @@
+"""Query backends behind the dashboard, chosen with ``BREMEN_BACKEND``.
+
+Every backend answers the questions the notebook asks (the territories of
+a year, the age group rows of a selection with their shares, its summary
+row, the map table of a level and the summary of all years) with the same
+frames. ``pandas`` (the default) keeps the panel and the ingest-time
+summaries in memory. ``duckdb`` registers the Parquet partitions of the
+catalog as a view and runs every question as SQL; ``polars`` builds each
+one as a lazy query over a scan of the partitions. With both, filters and
+column selections are pushed down into the scan, so only the result of a
+query is ever loaded. They need the optional ``duckdb`` or ``polars``
+package.
+
+    BREMEN_BACKEND=duckdb marimo run Bremen-Bevoelkerung.py
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .catalog import Catalog
+from .index import TerritoryIndex
+from .ingest import partition_file
+from .profiling import profiled
+from .schema import AGE_GROUP_DTYPE, AGE_GROUPS, COLUMNS, COUNT_COLUMNS, DTYPES
+from .summary import SHARES, map_table, with_percentages
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+BACKEND = os.environ.get("BREMEN_BACKEND", "pandas")
+
+
+class PandasBackend:
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self._summary = catalog.load_summary()
+        self.index = TerritoryIndex(catalog.load_panel())
+
+    def territories(self, year: str) -> list[str]:
+        return self.index.territories(year)
+
+    def rows(self, year: str, territorial_unit: str) -> pd.DataFrame:
+        """Age group rows of one selection with their shares (``df_selected``)."""
+        return with_percentages(self.index.select(year, territorial_unit))
+
+    def summary_row(self, year: str, territorial_unit: str) -> pd.Series:
+        return self._summary.loc[(year, territorial_unit)]
+
+    def map_table(self, year: str, level: str) -> pd.DataFrame:
+        return map_table(self._summary, year, level)
+
+    def summary(self) -> pd.DataFrame:
+        """Summary of every year, indexed by (year, territorial_unit)."""
+        return self._summary
+
+
+# count column -> SQL of its share of the selection, as in with_percentages
+ROW_SHARES = {
+    column: f"100 / CAST(sum({column}) OVER () AS DOUBLE) * {column}"
+    for column in COUNT_COLUMNS
+}
+
+
+def _summary_sql(where: str) -> str:
+    """Totals, shares and median age groups per (year, territorial_unit).
+
+    The median of a measure is the first age group whose running sum
+    exceeds half of the total, the first group if there is no population,
+    like :func:`bremen.medians.median_age_groups`. Medians are returned as
+    positions in ``AGE_GROUPS``.
+    """
+    window = "PARTITION BY year, territorial_unit"
+    running = ",\n".join(
+        f"sum({c}) OVER ({window} ORDER BY age ROWS UNBOUNDED PRECEDING) AS running_{c},"
+        f" sum({c}) OVER ({window}) AS total_{c}"
+        for c in COUNT_COLUMNS
+    )
+    totals = ",\n".join(f"sum({c})::INTEGER AS {c}" for c in COUNT_COLUMNS)
+    medians = ",\n".join(
+        f"coalesce(min(age) FILTER (WHERE running_{c} > total_{c} / 2), min(age))"
+        f" AS median_{c}"
+        for c in COUNT_COLUMNS
+    )
+    shares = ",\n".join(
+        f"100 / {denominator}::DOUBLE * {numerator} AS {name}"
+        for name, (numerator, denominator) in SHARES.items()
+    )
+    return f"""
+        WITH age_rows AS (
+            SELECT *, list_position($age_groups, age_group) - 1 AS age
+            FROM population
+            WHERE age_group <> 'Insgesamt' AND ({where})
+        ),
+        running AS (SELECT *, {running} FROM age_rows),
+        totals AS (
+            SELECT year, territorial_unit, {totals}, {medians}
+            FROM running
+            GROUP BY year, territorial_unit
+        )
+        SELECT year, territorial_unit, {", ".join(COUNT_COLUMNS)}, {shares},
+            {", ".join(f"median_{c}" for c in COUNT_COLUMNS)}
+        FROM totals
+        ORDER BY year, territorial_unit
+    """
+
+
+def _label_medians(frame: pd.DataFrame) -> pd.DataFrame:
+    """Turn median positions in ``AGE_GROUPS`` into age group labels."""
+    for column in COUNT_COLUMNS:
+        frame[f"median_{column}"] = pd.Categorical.from_codes(
+            frame[f"median_{column}"].to_numpy(np.int64), dtype=AGE_GROUP_DTYPE
+        )
+    return frame.set_index(["year", "territorial_unit"])
+
+
+def _sql_string(value: str) -> str:
+    """``value`` as a quoted SQL string literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+class DuckDBBackend:
+    def __init__(self, catalog: Catalog, threads: int | None = None):
+        if duckdb is None:
+            raise ImportError("the duckdb backend needs the duckdb package")
+        self.catalog = catalog
+        self.connection = duckdb.connect()
+        self.connection.execute("SET enable_progress_bar = false")
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+
+        # DDL takes no prepared parameters, so the paths are inlined as literals
+        files = ", ".join(
+            _sql_string(str(partition_file(path, catalog.cache_dir)))
+            for path in catalog.files.values()
+        )
+        self.connection.execute(
+            f"""
+            CREATE VIEW population AS
+            SELECT * FROM read_parquet(
+                [{files}], hive_partitioning = true, hive_types = {{'year': VARCHAR}}
+            )
+            """
+        )
+
+    def _query(self, sql: str, parameters: dict) -> pd.DataFrame:
+        return self.connection.execute(sql, parameters).df()
+
+    def _summary(self, where: str, parameters: dict) -> pd.DataFrame:
+        return _label_medians(
+            self._query(_summary_sql(where), {"age_groups": AGE_GROUPS[:-1], **parameters})
+        )
+
+    def territories(self, year: str) -> list[str]:
+        frame = self._query(
+            "SELECT DISTINCT territorial_unit FROM population WHERE year = $year",
+            {"year": year},
+        )
+        return sorted(frame["territorial_unit"])
+
+    @profiled("duckdb.rows")
+    def rows(self, year: str, territorial_unit: str) -> pd.DataFrame:
+        """Age group rows of one selection with their shares (``df_selected``)."""
+        shares = ", ".join(f"{sql} AS percentage_{c}" for c, sql in ROW_SHARES.items())
+        frame = self._query(
+            f"""
+            SELECT year, {", ".join(COLUMNS)}, {shares}
+            FROM population
+            WHERE year = $year AND territorial_unit = $unit AND age_group <> 'Insgesamt'
+            ORDER BY list_position($age_groups, age_group)
+            """,
+            {"year": year, "unit": territorial_unit, "age_groups": AGE_GROUPS},
+        )
+        return frame.astype({"year": "category", **DTYPES})
+
+    @profiled("duckdb.summary_row")
+    def summary_row(self, year: str, territorial_unit: str) -> pd.Series:
+        summary = self._summary(
+            "year = $year AND territorial_unit = $unit",
+            {"year": year, "unit": territorial_unit},
+        )
+        return summary.loc[(year, territorial_unit)]
+
+    @profiled("duckdb.map_table")
+    def map_table(self, year: str, level: str) -> pd.DataFrame:
+        summary = self._summary(
+            "year = $year AND contains(territorial_unit, $level)",
+            {"year": year, "level": level},
+        )
+        return map_table(summary, year, level)
+
+    @profiled("duckdb.summary")
+    def summary(self) -> pd.DataFrame:
+        """Summary of every year, indexed by (year, territorial_unit)."""
+        return self._summary("true", {})
+
+
+class PolarsBackend:
+    def __init__(self, catalog: Catalog):
+        if pl is None:
+            raise ImportError("the polars backend needs the polars package")
+        self.catalog = catalog
+        files = [
+            str(partition_file(path, catalog.cache_dir)) for path in catalog.files.values()
+        ]
+        self.population = pl.scan_parquet(
+            files, hive_partitioning=True, hive_schema={"year": pl.String}
+        )
+
+    def _age_rows(self, *predicates) -> "pl.LazyFrame":
+        """Age group rows matching ``predicates``, with their position ``age``."""
+        return self.population.filter(
+            pl.col("age_group") != "Insgesamt", *predicates
+        ).with_columns(age=pl.col("age_group").cast(pl.Enum(AGE_GROUPS)).to_physical())
+
+    def _summary(self, *predicates) -> pd.DataFrame:
+        # the first age group whose running sum exceeds half of the total,
+        # the first group without population; like median_age_groups this
+        # relies on the age order of the rows within a territory (file order)
+        group = ("year", "territorial_unit")
+        totals = (
+            self._age_rows(*predicates)
+            .with_columns(
+                pl.col(COUNT_COLUMNS).cum_sum().over(group).name.prefix("running_"),
+                (pl.col(COUNT_COLUMNS).sum().over(group) / 2).name.prefix("half_"),
+            )
+            .group_by(*group)
+            .agg(
+                *[pl.col(c).sum().cast(pl.Int32) for c in COUNT_COLUMNS],
+                *[
+                    pl.when(pl.col(f"running_{c}") > pl.col(f"half_{c}"))
+                    .then(pl.col("age"))
+                    .min()
+                    .fill_null(pl.col("age").min())
+                    .alias(f"median_{c}")
+                    for c in COUNT_COLUMNS
+                ],
+            )
+        )
+        shares = [
+            (100 / pl.col(denominator).cast(pl.Float64) * pl.col(numerator)).alias(name)
+            for name, (numerator, denominator) in SHARES.items()
+        ]
+        frame = (
+            totals.select(
+                "year",
+                pl.col("territorial_unit").cast(pl.String),
+                *COUNT_COLUMNS,
+                *shares,
+                *[f"median_{c}" for c in COUNT_COLUMNS],
+            )
+            .sort("year", "territorial_unit")
+            .collect()
+            .to_pandas()
+        )
+        return _label_medians(frame)
+
+    def territories(self, year: str) -> list[str]:
+        units = (
+            self.population.filter(pl.col("year") == year)
+            .select(pl.col("territorial_unit").unique())
+            .collect()
+        )
+        return sorted(units["territorial_unit"])
+
+    @profiled("polars.rows")
+    def rows(self, year: str, territorial_unit: str) -> pd.DataFrame:
+        """Age group rows of one selection with their shares (``df_selected``)."""
+        frame = (
+            self._age_rows(
+                pl.col("year") == year, pl.col("territorial_unit") == territorial_unit
+            )
+            .sort("age")
+            .select(
+                "year",
+                *COLUMNS,
+                *[
+                    (100 / pl.col(c).sum().cast(pl.Float64) * pl.col(c)).alias(
+                        f"percentage_{c}"
+                    )
+                    for c in COUNT_COLUMNS
+                ],
+            )
+            .collect()
+            .to_pandas()
+        )
+        return frame.astype({"year": "category", **DTYPES})
+
+    @profiled("polars.summary_row")
+    def summary_row(self, year: str, territorial_unit: str) -> pd.Series:
+        summary = self._summary(
+            pl.col("year") == year, pl.col("territorial_unit") == territorial_unit
+        )
+        return summary.loc[(year, territorial_unit)]
+
+    @profiled("polars.map_table")
+    def map_table(self, year: str, level: str) -> pd.DataFrame:
+        summary = self._summary(
+            pl.col("year") == year,
+            pl.col("territorial_unit").cast(pl.String).str.contains(level, literal=True),
+        )
+        return map_table(summary, year, level)
+
+    @profiled("polars.summary")
+    def summary(self) -> pd.DataFrame:
+        """Summary of every year, indexed by (year, territorial_unit)."""
+        return self._summary()
+
+
+BACKENDS = {"pandas": PandasBackend, "duckdb": DuckDBBackend, "polars": PolarsBackend}
+
+
+def open_backend(catalog: Catalog, name: str = BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name!r}, choose one of {list(BACKENDS)}")
+    return BACKENDS[name](catalog)
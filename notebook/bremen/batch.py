@@ -0,0 +1,213 @@
+"""Render static dashboards for every territory and year.
+
+    python -m bremen.batch --out dist/dashboards --workers 8
+
+For every year of the catalog and every Stadtteil, Ortsteil and Stadtbezirk
+(plus Stadt Bremen) this writes the stats (``stats.json`` and the grid of
+the dashboard as ``stats.html``) and the three pyramid tabs into
+``<out>/<year>/<territory>/``; the choropleth of every level goes
+to ``<out>/<year>/map-<level>.*``. Specs are written as Vega-Lite JSON and
+HTML, and as PNG when ``vl-convert-python`` is installed.
+
+Each output directory records the digest of the inputs it was rendered
+from in ``inputs.json``; a rerun skips everything whose inputs did not
+change, so an interrupted run can simply be started again.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from . import ROOT_DIR
+from .catalog import Catalog
+from .charts import SERIES, age_pyramids, choropleth, to_html
+from .geometry import LEVELS, layer_digest
+from .index import TerritoryIndex
+from .schema import COUNT_COLUMNS
+from .summary import SHARES, UNIT_COLUMNS, map_table
+from .topology import TOPOLOGY_VERSION, load_topojson, with_properties
+from .widgets import GENDERS, GROUPS, share
+
+try:
+    import vl_convert
+except ImportError:
+    vl_convert = None
+
+# bump when the rendered output changes, forces a full re-render
+RENDER_VERSION = 3
+
+MAP_WIDTH, MAP_HEIGHT = 600, 400
+
+STATS_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+<h1>{title}</h1>
+<table>
+<tr><th></th>{head}</tr>
+{rows}
+</table>
+</body>
+</html>
+"""
+
+_state = {}
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^\w]+", "-", name).strip("-").lower()
+
+
+def _load():
+    """Load the catalog once per worker process."""
+    if not _state:
+        catalog = Catalog()
+        summary = catalog.load_summary()
+        _state.update(
+            catalog=catalog,
+            summary=summary,
+            index=TerritoryIndex(catalog.load_panel()),
+        )
+    return _state
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _is_done(target: Path, digest: str) -> bool:
+    inputs = target / "inputs.json"
+    return inputs.exists() and json.loads(inputs.read_text())["digest"] == digest
+
+
+def _optional(value, kind):
+    """``kind(value)``, None for a missing value (JSON has no NaN)."""
+    return None if pd.isna(value) else kind(value)
+
+
+def _stats_html(title: str, selection) -> str:
+    """The stats grid of the dashboard as a static page, one column per group."""
+    head = "".join(f"<th>{label}</th>" for label in GROUPS.values())
+    rows = []
+    for gender in GENDERS:
+        cells = []
+        for group in GROUPS:
+            percent = share(selection, group, gender)
+            percent = "&ndash;" if pd.isna(percent) else f"{percent:.1f} %"
+            count = selection[f"{group}_{gender}"]
+            cells.append(f"<td>{count}<br><small>{percent}</small></td>")
+        rows.append(f"<tr><th>{gender}</th>{''.join(cells)}</tr>")
+    return STATS_PAGE.format(title=html.escape(title), head=head, rows="\n".join(rows))
+
+
+def _write_spec(target: Path, name: str, spec: dict):
+    (target / f"{name}.vl.json").write_text(json.dumps(spec))
+    (target / f"{name}.html").write_text(to_html(spec))
+    if vl_convert is not None:
+        (target / f"{name}.png").write_bytes(vl_convert.vegalite_to_png(spec))
+
+
+def render_territory(year: str, territory: str, out: Path, digest: str) -> bool:
+    target = Path(out) / year / slug(territory)
+    if _is_done(target, digest):
+        return False
+
+    state = _load()
+    selection = state["summary"].loc[(year, territory)]
+    rows = state["index"].select(year, territory)
+
+    target.mkdir(parents=True, exist_ok=True)
+    # territories with suppressed counts have no shares
+    stats = {
+        **{column: int(selection[column]) for column in COUNT_COLUMNS},
+        **{column: _optional(selection[column], float) for column in SHARES},
+        **{
+            f"median_{column}": _optional(selection[f"median_{column}"], str)
+            for column in COUNT_COLUMNS
+        },
+    }
+    (target / "stats.json").write_text(json.dumps(stats, indent=2, allow_nan=False))
+    (target / "stats.html").write_text(_stats_html(f"{territory}, {year}", selection))
+
+    for series in SERIES:
+        spec = age_pyramids(rows, selection, series).to_dict()
+        _write_spec(target, f"pyramids-{series}", spec)
+
+    (target / "inputs.json").write_text(json.dumps({"digest": digest}))
+    return True
+
+
+def render_map(year: str, level: str, out: Path, digest: str) -> bool:
+    target = Path(out) / year
+    name = f"map-{slug(level)}"
+    inputs = target / f"{name}.inputs.json"
+    if inputs.exists() and json.loads(inputs.read_text())["digest"] == digest:
+        return False
+
+    state = _load()
+    unit = UNIT_COLUMNS[level]
+    table = map_table(state["summary"], year, level)
+    topology = with_properties(
+        load_topojson(level, MAP_WIDTH, MAP_HEIGHT), table, unit
+    )
+
+    target.mkdir(parents=True, exist_ok=True)
+    _write_spec(target, name, choropleth(topology, level, unit).to_dict())
+    inputs.write_text(json.dumps({"digest": digest}))
+    return True
+
+
+def territories(index: TerritoryIndex, year: str) -> list[str]:
+    return ["Stadt Bremen"] + [
+        unit
+        for unit in index.territories(year)
+        if any(f"({level})" in unit for level in LEVELS)
+    ]
+
+
+def run(out, workers=None) -> dict:
+    catalog = Catalog()
+    catalog.refresh()
+    state = _load()
+
+    jobs = []
+    for year, entry in catalog.manifest.items():
+        for territory in territories(state["index"], year):
+            digest = _digest(RENDER_VERSION, entry["sha256"], territory)
+            jobs.append((render_territory, year, territory, out, digest))
+        for level, layer in LEVELS.items():
+            digest = _digest(
+                RENDER_VERSION,
+                TOPOLOGY_VERSION,
+                entry["sha256"],
+                layer_digest(f"{layer}_BRE"),
+            )
+            jobs.append((render_map, year, level, out, digest))
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(job, *args) for job, *args in jobs]
+        rendered = sum(future.result() for future in futures)
+
+    return {"jobs": len(jobs), "rendered": rendered, "skipped": len(jobs) - rendered}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, default=ROOT_DIR / "dist" / "dashboards")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.out, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Benchmarks of the dashboard pipeline, stage by stage.
+
+    python -m bremen.bench                   # real data/raw files
+    python -m bremen.bench --scale 10        # raw files with 10x the rows
+    python -m bremen.bench --data /tmp/syn   # output of bremen.synthetic
+    python -m bremen.bench --compare A B     # compare two stored runs
+
+Every stage is timed in isolation (best and median of ``--repeat`` runs)
+and run once more under ``tracemalloc`` for its peak memory. Results are
+stored as ``data/bench/<commit>[-x<scale>|-<data>].json`` so that runs on
+different commits can be compared.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import geopandas as gpd
+
+from . import BOUNDARY_DIR, ROOT_DIR
+from . import geometry, topology
+from .catalog import Catalog
+from .charts import age_pyramids, choropleth, to_html
+from .geometry import LEVELS
+from .index import TerritoryIndex
+from .ingest import read_raw
+from .medians import median_age_groups
+from .quantiles import AgeDistribution
+from .schema import COUNT_COLUMNS
+from .summary import UNIT_COLUMNS, map_table, summarize, with_percentages
+from .trend import trends
+
+RESULT_DIR = ROOT_DIR / "data" / "bench"
+
+TERRITORY = "Mitte (Stadtteil)"
+LEVEL = "Stadtteil"
+
+
+def scale_raw(path: Path, factor: int, target_dir: Path) -> Path:
+    """Copy of a raw file with its data rows repeated ``factor`` times.
+
+    Every copy gets its own territorial units (``Mitte #2 (Stadtteil)``), so
+    the scaled file has ``factor`` times as many territories, not duplicates.
+    """
+    lines = Path(path).read_text(encoding="ISO-8859-1").splitlines(keepends=True)
+    end = next(i for i, line in enumerate(lines) if i >= 4 and not line.strip())
+    header, body, footer = lines[:4], lines[4:end], lines[end:]
+
+    scaled = list(body)
+    for copy in range(2, factor + 1):
+        for line in body:
+            key, unit, rest = line.split(";", 2)
+            name, _, level = unit.partition(" (")
+            unit = f"{name} #{copy} ({level}" if level else f"{unit} #{copy}"
+            scaled.append(f"{key};{unit};{rest}")
+
+    target = Path(target_dir) / Path(path).name
+    target.write_text("".join(header + scaled + footer), encoding="ISO-8859-1")
+    return target
+
+
+def stages(catalog: Catalog, boundary_dir=BOUNDARY_DIR) -> dict:
+    """The benchmarked stages, each a function without arguments."""
+    year = catalog.years[0]
+    raw_file = catalog.files[year]
+    frame = read_raw(raw_file)
+    summary = catalog.load_summary()
+    panel = catalog.load_panel()
+    index = TerritoryIndex(panel)
+
+    # Mitte in the real data, the first Stadtteil in synthetic data
+    territory = min(
+        (unit for unit in index.territories(year) if f"({LEVEL})" in unit),
+        key=lambda unit: unit != TERRITORY,
+    )
+    rows = index.select(year, territory)
+    selection = summary.loc[(year, territory)]
+    unit = UNIT_COLUMNS[LEVEL]
+    layer = f"{LEVELS[LEVEL]}_BRE"
+    table = map_table(summary, year, LEVEL)
+    dirs = {"boundary_dir": boundary_dir, "cache_dir": catalog.cache_dir}
+
+    def boundaries():
+        geometry._memo.clear()
+        return geometry.load_layer(layer, **dirs)
+
+    def topojson():
+        topology._memo.clear()
+        return topology.load_topojson(LEVEL, 600, 400, **dirs)
+
+    def charts():
+        pyramids = age_pyramids(rows, selection, "population").to_dict()
+        mapped = topology.with_properties(
+            topology.load_topojson(LEVEL, 600, 400, **dirs), table, unit
+        )
+        return [to_html(pyramids), to_html(choropleth(mapped, LEVEL, unit).to_dict())]
+
+    return {
+        "parse": lambda: read_raw(raw_file),
+        "select": lambda: index.select(year, territory),
+        "percentages": lambda: with_percentages(index.select(year, territory)),
+        "medians": lambda: median_age_groups(
+            frame[frame["age_group"] != "Insgesamt"], COUNT_COLUMNS
+        ),
+        "summary": lambda: summarize(frame),
+        "quantiles": lambda: AgeDistribution(panel).quantile_ages([0.25, 0.5, 0.75]),
+        "map_table": lambda: map_table(summary, year, LEVEL),
+        "trend": lambda: trends(summary),
+        "shapefile": lambda: gpd.read_file(
+            Path(boundary_dir) / f"{layer}.shp", engine="pyogrio"
+        ),
+        "boundaries": boundaries,
+        "topojson": topojson,
+        "charts": charts,
+    }
+
+
+def measure(function, repeat: int) -> dict:
+    function()  # warm up imports and caches outside of the timing
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_bytes": peak,
+    }
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(scale: int = 1, repeat: int = 5, only=None, data=None) -> dict:
+    boundary_dir = BOUNDARY_DIR
+    if data is None:
+        catalog = Catalog()
+    else:
+        catalog = Catalog(Path(data) / "raw", Path(data) / "cache")
+        boundary_dir = Path(data) / BOUNDARY_DIR.name
+    catalog.refresh()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if scale > 1:
+            # a throwaway catalog over the scaled copies of the raw files
+            raw_dir = Path(tmp) / "raw"
+            raw_dir.mkdir()
+            for path in catalog.files.values():
+                scale_raw(path, scale, raw_dir)
+            catalog = Catalog(raw_dir, Path(tmp) / "cache")
+            catalog.refresh()
+
+        benchmarks = stages(catalog, boundary_dir)
+        results = {
+            name: measure(function, repeat)
+            for name, function in benchmarks.items()
+            if not only or name in only
+        }
+
+    return {
+        "commit": commit(),
+        "scale": scale,
+        "data": None if data is None else Path(data).name,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "stages": results,
+    }
+
+
+def result_file(result: dict) -> Path:
+    suffix = f"-x{result['scale']}" if result["scale"] > 1 else ""
+    if result.get("data"):
+        suffix += f"-{result['data']}"
+    return RESULT_DIR / f"{result['commit']}{suffix}.json"
+
+
+def report(result: dict, baseline: dict | None = None) -> str:
+    lines = [f"{'stage':<12} {'best':>10} {'median':>10} {'peak':>10}"]
+    for name, stage in result["stages"].items():
+        line = (
+            f"{name:<12} {stage['best_s'] * 1000:>8.2f}ms"
+            f" {stage['median_s'] * 1000:>8.2f}ms"
+            f" {stage['peak_bytes'] / 2**20:>8.2f}MB"
+        )
+        before = (baseline or {}).get("stages", {}).get(name)
+        if before:
+            line += f"  x{stage['best_s'] / before['best_s']:.2f} time"
+            line += f"  x{stage['peak_bytes'] / max(before['peak_bytes'], 1):.2f} memory"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--data", type=Path, help="directory from bremen.synthetic")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="run only these stages")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BASE", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        base, new = (json.loads(path.read_text()) for path in args.compare)
+        print(report(new, base))
+        return
+
+    result = run(args.scale, args.repeat, args.only, args.data)
+    target = result_file(result)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(result, indent=2))
+
+    print(report(result))
+    print(f"\nstored in {target.relative_to(ROOT_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Catalog of the raw 12411-03-03 files and their Parquet partitions.
+
+The raw directory is scanned for ``12411-03-03-<year>.csv``. For every file
+the manifest (``data/cache/12411-03-03/manifest.json``) keeps the content
+hash, row count and parsed schema of the partition built from it, so a
+refresh only parses files that are new or have changed.
+"""
+
+import json
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import pandas as pd
+
+from . import CACHE_DIR, RAW_DIR
+from .files import write_text
+from .profiling import profiled
+from .schema import COLUMNS
+from .ingest import (
+    FILENAME_PATTERN,
+    TABLE,
+    ingest,
+    is_current,
+    partition_dir,
+    partition_file,
+    summary_file,
+)
+
+
+class Catalog:
+    def __init__(self, raw_dir=RAW_DIR, cache_dir=CACHE_DIR):
+        self.raw_dir = Path(raw_dir)
+        self.cache_dir = Path(cache_dir)
+        self.manifest_file = self.cache_dir / TABLE / "manifest.json"
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self) -> dict:
+        if not self.manifest_file.exists():
+            return {}
+        return json.loads(self.manifest_file.read_text())
+
+    def _write_manifest(self):
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        manifest = json.dumps(self.manifest, indent=2, sort_keys=True)
+        write_text(self.manifest_file, manifest)
+
+    def discover(self) -> dict[str, Path]:
+        """Map year to raw file, newest year first."""
+        found = {}
+        for path in self.raw_dir.iterdir():
+            match = FILENAME_PATTERN.match(path.name)
+            if match:
+                found[match.group(1)] = path
+        return dict(sorted(found.items(), reverse=True))
+
+    @property
+    def files(self) -> dict[str, Path]:
+        return {year: Path(entry["source"]) for year, entry in self.manifest.items()}
+
+    @property
+    def years(self) -> list[str]:
+        return list(self.files)
+
+    @profiled("catalog.refresh")
+    def refresh(self, max_workers=None) -> list[str]:
+        """Bring the partitions in line with the raw directory.
+
+        Returns the years that had to be (re-)ingested.
+        """
+        found = self.discover()
+        stale = [
+            year
+            for year, path in found.items()
+            if not (
+                self.manifest.get(year, {}).get("source") == str(path)
+                and partition_file(path, self.cache_dir).exists()
+                and summary_file(path, self.cache_dir).exists()
+                and is_current(path, self.manifest.get(year))
+            )
+        ]
+
+        if len(stale) > 1:
+            with ProcessPoolExecutor(max_workers) as pool:
+                entries = list(
+                    pool.map(ingest, [found[y] for y in stale], repeat(self.cache_dir))
+                )
+        else:
+            entries = [ingest(found[year], self.cache_dir) for year in stale]
+
+        self.manifest.update(zip(stale, entries))
+
+        for year in set(self.manifest) - set(found):
+            del self.manifest[year]
+            shutil.rmtree(partition_dir(year, self.cache_dir), ignore_errors=True)
+
+        self.manifest = dict(sorted(self.manifest.items(), reverse=True))
+        self._write_manifest()
+        return stale
+
+    @profiled("catalog.load_panel")
+    def load_panel(self, years=None, max_workers=None) -> pd.DataFrame:
+        """Read the partitions into one long frame with a leading ``year`` column."""
+        files = self.files
+        years = list(files) if years is None else list(years)
+
+        with ThreadPoolExecutor(max_workers) as pool:
+            frames = list(
+                pool.map(
+                    pd.read_parquet,
+                    (partition_file(files[year], self.cache_dir) for year in years),
+                )
+            )
+
+        # territory categories differ between years, re-unify after stacking
+        return (
+            pd.concat(
+                [frame.assign(year=year) for year, frame in zip(years, frames)],
+                ignore_index=True,
+            )[["year"] + COLUMNS]
+            .astype(
+                {"year": "category", "territory_key": "category", "territorial_unit": "category"}
+            )
+        )
+
+    @profiled("catalog.load_summary")
+    def load_summary(self, years=None) -> pd.DataFrame:
+        """Read the per-territory summaries, indexed by (year, territorial_unit)."""
+        files = self.files
+        years = list(files) if years is None else list(years)
+
+        return pd.concat(
+            {
+                year: pd.read_parquet(summary_file(files[year], self.cache_dir))
+                for year in years
+            },
+            names=["year", "territorial_unit"],
+        ).sort_index()
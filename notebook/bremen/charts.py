@@ -0,0 +1,349 @@
+"""Chart builders of the dashboard and a cache of their Vega-Lite specs.
+
+The builders are shared by the notebook and everything that renders the
+dashboard outside of marimo. :class:`SpecCache` keeps the serialized specs
+of recently shown selections, so a selection seen before is served without
+building or validating an Altair chart again.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Callable
+
+import altair as alt
+import pandas as pd
+from altair.utils.html import spec_to_html
+
+from .profiling import profiled
+from .schema import AGE_GROUPS, COUNT_COLUMNS
+
+# series prefix -> tab title
+SERIES = {
+    "population": "Total population",
+    "german": "German population",
+    "foreigner": "Foreign population",
+}
+
+MAP_FEATURES = {
+    "Total population": "population_total",
+    "Percentage of foreigners": "percentage_foreigner",
+    "Percentage of males": "percentage_male",
+    "Percentage of females": "percentage_female",
+    "Median age group (total population)": "median_population_total",
+    "Median age group (foreigners)": "median_foreigner_total",
+    "Median age group (germans)": "median_german_total",
+}
+
+
+def generate_age_distribution_graph(
+    data: alt.NamedData,
+    graph_width: int,
+    yaxis_data: str,
+    xaxis_data_left: str,
+    xaxis_data_right: str,
+    median_left: str,
+    median_right: str,
+    title_left: str = None,
+    title_right: str = None,
+):
+    base = alt.Chart(data).properties(
+        width=graph_width,
+    )
+
+    left_bar_graph = (
+        base.mark_bar(color="#CFA6EA")
+        .encode(
+            alt.Y(f"{yaxis_data}:N").sort(AGE_GROUPS).axis(None),
+            alt.X(f"{xaxis_data_left}:Q", title="Population").sort("descending"),
+            tooltip=[
+                alt.Tooltip(f"{yaxis_data}:N", title="Age group"),
+                alt.Tooltip(f"{xaxis_data_left}:Q", title="Population"),
+            ],
+        )
+        .properties(title=title_left)
+    )
+
+    median_indicator_left = (
+        base.transform_filter(alt.datum[yaxis_data] == median_left)
+        .mark_rule(color="red", strokeWidth=3.0)
+        .encode(alt.Y(f"{yaxis_data}:N").sort(AGE_GROUPS))
+    )
+
+    left_graph = left_bar_graph + median_indicator_left
+
+    ###############
+
+    right_bar_graph = (
+        base.mark_bar(color="#148BE7")
+        .encode(
+            alt.Y(f"{yaxis_data}:N").sort(AGE_GROUPS).axis(None),
+            alt.X(f"{xaxis_data_right}:Q", title="Population"),
+            tooltip=[
+                alt.Tooltip(f"{xaxis_data_right}:Q", title="Population"),
+                alt.Tooltip(f"{yaxis_data}:N", title="Age group"),
+            ],
+        )
+        .properties(title=title_right)
+    )
+
+    median_indicator_right = (
+        base.transform_filter(alt.datum[yaxis_data] == median_right)
+        .mark_rule(color="red", strokeWidth=3.0)
+        .encode(alt.Y(f"{yaxis_data}:N").sort(AGE_GROUPS))
+    )
+
+    middle = (
+        base.encode(
+            alt.Y(f"{yaxis_data}:N").sort(AGE_GROUPS).axis(None),
+            alt.Text(f"{yaxis_data}:N"),
+        )
+        .mark_text(color="white")
+        .properties(width=80)
+    )
+
+    right_graph = right_bar_graph + median_indicator_right
+
+    return alt.concat(left_graph, middle, right_graph, spacing=5)
+
+
+def generate_single_age_distribution(
+    data: alt.NamedData,
+    graph_width: int,
+    yaxis_data: str,
+    xaxis_data: str,
+    median: str,
+    title: str = None,
+):
+    base = alt.Chart(data).properties(
+        width=graph_width,
+    )
+
+    bar_graph = (
+        base.mark_bar(color="#65BFAF")
+        .encode(
+            alt.Y(f"{yaxis_data}:N").sort(AGE_GROUPS).title("Age group"),
+            alt.X(f"{xaxis_data}:Q", title="Population"),
+            tooltip=[
+                alt.Tooltip(f"{yaxis_data}:N", title="Age group"),
+                alt.Tooltip(f"{xaxis_data}:Q", title="Population"),
+            ],
+        )
+        .properties(title=title)
+    )
+
+    median_indicator = (
+        base.transform_filter(alt.datum[yaxis_data] == median)
+        .mark_rule(color="red", strokeWidth=3.0)
+        .encode(alt.Y(f"{yaxis_data}:N").sort(AGE_GROUPS))
+    )
+
+    return bar_graph + median_indicator
+
+
+@profiled("charts.age_pyramids")
+def age_pyramids(
+    rows: pd.DataFrame, selection: pd.Series, series: str, graph_width: int = 350
+) -> alt.HConcatChart:
+    """Total and female/male pyramid of one series, sharing one dataset.
+
+    ``rows`` are the age group rows of the selected territory, ``selection``
+    is its row of the summary table (for the median age groups).
+    """
+    data = alt.NamedData(name="age_distribution")
+
+    total_graph = generate_single_age_distribution(
+        data=data,
+        graph_width=graph_width,
+        xaxis_data=f"{series}_total",
+        yaxis_data="age_group",
+        median=selection[f"median_{series}_total"],
+        title=SERIES[series],
+    )
+
+    gender_graph = generate_age_distribution_graph(
+        data=data,
+        graph_width=graph_width,
+        xaxis_data_left=f"{series}_female",
+        xaxis_data_right=f"{series}_male",
+        yaxis_data="age_group",
+        title_left="Female",
+        title_right="Male",
+        median_left=selection[f"median_{series}_female"],
+        median_right=selection[f"median_{series}_male"],
+    )
+
+    values = rows[["age_group"] + COUNT_COLUMNS].to_dict(orient="records")
+    return alt.hconcat(total_graph, gender_graph).properties(
+        datasets={"age_distribution": values}
+    )
+
+
+@profiled("charts.choropleth")
+def choropleth(
+    topology: dict,
+    level: str,
+    unit: str,
+    features: dict = MAP_FEATURES,
+    width: int = 600,
+    height: int = 400,
+) -> alt.Chart:
+    """Map of one level with every feature selectable in the browser.
+
+    ``topology`` already carries the feature values in its properties (see
+    :func:`bremen.topology.with_properties`); the selected feature is a
+    Vega-Lite parameter bound to a select, so switching it needs no Python.
+    The title names the selected feature.
+    """
+    map_metric = alt.param(
+        name="map_metric",
+        value=list(features.values())[0],
+        bind=alt.binding_select(
+            options=list(features.values()),
+            labels=list(features.keys()),
+            name="Choose map feature ",
+        ),
+    )
+
+    quantitative = [
+        field for field in features.values() if not field.startswith("median_")
+    ]
+    is_quantitative = f"indexof({quantitative}, map_metric) >= 0"
+    age_groups = AGE_GROUPS[:-1]
+    feature_name = (
+        f"{list(features.keys())}[indexof({list(features.values())}, map_metric)]"
+    )
+
+    return (
+        alt.Chart(
+            alt.InlineData(
+                values=topology,
+                format=alt.DataFormat(
+                    type="topojson", feature=next(iter(topology["objects"]))
+                ),
+            )
+        )
+        .mark_geoshape(stroke="green", strokeWidth=0.5)
+        .project(type="identity", reflectY=True)
+        # median age groups are coloured by their position in AGE_GROUPS
+        .transform_calculate(
+            raw="datum.properties[map_metric]",
+            value=f"{is_quantitative} ? datum.raw : indexof({age_groups}, datum.raw)",
+            display=f"{is_quantitative} ? format(datum.raw, '.2f') : datum.raw",
+        )
+        .encode(
+            color=alt.Color(
+                "value:Q",
+                legend=alt.Legend(
+                    title=None,
+                    labelExpr=f"{is_quantitative} ? format(datum.value, ',') "
+                    f": ({age_groups}[datum.value] || '')",
+                ),
+            ),
+            tooltip=[
+                alt.Tooltip(f"properties.{unit}:N", title=level),
+                alt.Tooltip("properties.size:Q", title="Area (qkm)", format=".2f"),
+                alt.Tooltip("properties.population_total:Q", title="Total population"),
+                alt.Tooltip("display:N", title="Selected feature"),
+            ],
+        )
+        .add_params(map_metric)
+        .properties(
+            title=alt.TitleParams(text=alt.ExprRef(f"'{level}e: ' + {feature_name}")),
+            width=width,
+            height=height,
+        )
+    )
+
+
+@profiled("charts.trend_lines")
+def trend_lines(
+    rows: pd.DataFrame, measures: dict, graph_width: int = 250
+) -> alt.HConcatChart:
+    """One line per measure across the years of a territory.
+
+    ``rows`` are the rows of one territory in :func:`bremen.trend.trends`,
+    indexed by year; the tooltips carry the change since the previous year.
+    """
+    data = alt.NamedData(name="trend")
+    charts = []
+    for measure, title in measures.items():
+        ordinal = measure.startswith("median_")
+        tooltip = [
+            alt.Tooltip("year:O", title="Year"),
+            alt.Tooltip(f"{measure}:O", title=title)
+            if ordinal
+            else alt.Tooltip(f"{measure}:Q", title=title, format=",.2f"),
+            alt.Tooltip("previous_year:O", title="Compared to"),
+            alt.Tooltip(f"{measure}_change:Q", title="Change", format="+,.2f"),
+        ]
+        if not ordinal:
+            tooltip.append(
+                alt.Tooltip(f"{measure}_change_pct:Q", title="Change (%)", format="+.2f")
+            )
+
+        # median age groups keep the whole age axis, not just the groups reached
+        y = (
+            alt.Y(f"{measure}:O").scale(domain=AGE_GROUPS[:-1])
+            if ordinal
+            else alt.Y(f"{measure}:Q")
+        )
+        charts.append(
+            alt.Chart(data)
+            .mark_line(point=True, color="#148BE7")
+            .encode(alt.X("year:O", title="Year"), y.title(None), tooltip=tooltip)
+            .properties(title=title, width=graph_width)
+        )
+
+    values = rows.reset_index().to_dict(orient="records")
+    return alt.hconcat(*charts).properties(datasets={"trend": values})
+
+
+@profiled("charts.to_html")
+def to_html(spec: dict) -> str:
+    return spec_to_html(
+        spec,
+        mode="vega-lite",
+        vega_version=alt.VEGA_VERSION,
+        vegaembed_version=alt.VEGAEMBED_VERSION,
+        vegalite_version=alt.VEGALITE_VERSION,
+    )
+
+
+class SpecCache:
+    """LRU cache of Vega-Lite specs bounded by their serialized size.
+
+    Keys are tuples like ``(year, territorial_unit, series, kind)``.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: tuple, build: Callable[[], alt.TopLevelMixin]) -> dict:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+        self.misses += 1
+        spec = build().to_dict()
+        size = len(json.dumps(spec))
+        self._entries[key] = (spec, size)
+        self.size += size
+
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+        return spec
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
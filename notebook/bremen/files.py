@@ -0,0 +1,53 @@
+"""Writing cache files that are shared between processes.
+
+Sessions of ``marimo run``, the ingest workers and the batch renderer all
+read and fill the same cache. A file is therefore written to a temporary
+path of its own writer and moved into place with :meth:`Path.replace`, so
+readers see either the old or the complete new file, never a partial one.
+Files named after the digest of their input are only deleted once a
+manifest records that a newer file took their place.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def temporary_path(target: Path) -> Path:
+    """Path next to ``target`` private to this process and thread."""
+    target = Path(target)
+    return target.with_name(f"{target.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+@contextmanager
+def replacing(target: Path):
+    """Yield a temporary path to write, which replaces ``target`` on success."""
+    tmp = temporary_path(target)
+    try:
+        yield tmp
+        tmp.replace(target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def write_text(target: Path, text: str):
+    with replacing(target) as tmp:
+        tmp.write_text(text)
+
+
+def supersede(manifest_file: Path, key: str, current: Path):
+    """Record ``current`` as the file of ``key`` and delete the one it replaces.
+
+    ``manifest_file`` maps keys to file names in its own directory.
+    """
+    manifest_file = Path(manifest_file)
+    manifest = json.loads(manifest_file.read_text()) if manifest_file.exists() else {}
+    previous = manifest.get(key)
+    if previous == current.name:
+        return
+    manifest[key] = current.name
+    write_text(manifest_file, json.dumps(manifest, indent=2, sort_keys=True))
+    if previous is not None:
+        (manifest_file.parent / previous).unlink(missing_ok=True)
@@ -0,0 +1,161 @@
+"""Streaming reader for GENESIS table exports such as 12411-03-03.
+
+A GENESIS CSV is a title and a block of header lines, the data rows, and a
+footer of footnotes. The header and footer are located by scanning for the
+first and last data row (a line starting with a numeric territory key and
+``;``), only the bytes in between are handed to pyarrow's streaming CSV
+reader. Suppressed cells (``x``) are read as nulls and filled with 0, every
+batch is converted to the target types straight away, so memory stays
+bounded by the block size plus the typed result.
+"""
+
+import io
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+from .schema import AGE_GROUPS, COLUMNS, COUNT_COLUMNS
+
+ENCODING = "ISO-8859-1"
+SUPPRESSED = "x"
+BLOCK_SIZE = 1 << 20
+
+DATA_ROW = re.compile(rb"^\d+;")
+
+AGE_GROUP_LABELS = pa.array(AGE_GROUPS)
+
+# arrow types while parsing; strings are dictionary encoded per batch
+ARROW_TYPES = {
+    "territory_key": pa.string(),
+    "territorial_unit": pa.string(),
+    "date": pa.timestamp("ns"),
+    "age_group": pa.string(),
+    **{column: pa.int32() for column in COUNT_COLUMNS},
+}
+
+
+def body_range(path, probe: int = 1 << 16) -> tuple[int, int]:
+    """Byte offsets of the first and past the last data row of ``path``."""
+    with open(path, "rb") as f:
+        start = 0
+        for line in f:
+            if DATA_ROW.match(line):
+                break
+            start += len(line)
+        else:
+            raise ValueError(f"{path} contains no data rows")
+
+        # the footer is short, read backwards from the end until a block
+        # holds the line break in front of the last data row
+        size = f.seek(0, io.SEEK_END)
+        offset = size
+        while True:
+            offset = max(start, offset - probe)
+            f.seek(offset)
+            tail = f.read(size - offset)
+            lines = tail.splitlines(keepends=True)
+            if offset > start:
+                # the first line of the block may be cut off
+                skipped, lines = len(lines[0]), lines[1:]
+            else:
+                skipped = 0
+            position = offset + skipped
+            last = None
+            for line in lines:
+                position += len(line)
+                if DATA_ROW.match(line):
+                    last = position
+            if last is not None:
+                return start, last
+            if offset == start:
+                raise ValueError(f"{path} contains no data rows")
+            probe *= 2
+
+
+class _Slice(io.RawIOBase):
+    """Read-only view on the bytes ``start:stop`` of a binary file."""
+
+    def __init__(self, f, start: int, stop: int):
+        self._f = f
+        self._f.seek(start)
+        self._left = stop - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._f.readinto(memoryview(buffer)[: min(len(buffer), self._left)])
+        self._left -= count
+        return count
+
+
+def iter_batches(path, block_size: int = BLOCK_SIZE):
+    """Yield the data rows of ``path`` as typed ``pyarrow.RecordBatch`` es."""
+    start, stop = body_range(path)
+    with open(path, "rb") as f:
+        reader = csv.open_csv(
+            io.BufferedReader(_Slice(f, start, stop), block_size),
+            read_options=csv.ReadOptions(
+                column_names=COLUMNS, encoding=ENCODING, block_size=block_size
+            ),
+            parse_options=csv.ParseOptions(delimiter=";"),
+            convert_options=csv.ConvertOptions(
+                column_types=ARROW_TYPES,
+                null_values=[SUPPRESSED],
+                strings_can_be_null=False,
+            ),
+        )
+        for batch in reader:
+            yield pa.RecordBatch.from_arrays(
+                [_convert(name, column) for name, column in zip(COLUMNS, batch.columns)],
+                names=COLUMNS,
+            )
+
+
+def _convert(name: str, column: pa.Array) -> pa.Array:
+    if name in COUNT_COLUMNS:
+        return pc.fill_null(column, 0)
+    if name == "age_group":
+        # unknown labels become nulls, like in an ``astype`` to the dtype
+        return pa.DictionaryArray.from_arrays(
+            pc.index_in(column, value_set=AGE_GROUP_LABELS).cast(pa.int8()),
+            AGE_GROUP_LABELS,
+            ordered=True,
+        )
+    if pa.types.is_string(column.type):
+        return pc.dictionary_encode(column)
+    return column
+
+
+def _sort_dictionary(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Sort the (unified) dictionary of ``column`` and remap its indices."""
+    dictionary = column.chunk(0).dictionary
+    order = pc.sort_indices(dictionary)
+    rank = pa.array(np.argsort(order.to_numpy()).astype(np.int32))
+    sorted_dictionary = dictionary.take(order)
+    return pa.chunked_array(
+        [
+            pa.DictionaryArray.from_arrays(pc.take(rank, chunk.indices), sorted_dictionary)
+            for chunk in column.chunks
+        ]
+    )
+
+
+def read_table(path, block_size: int = BLOCK_SIZE) -> pd.DataFrame:
+    """Read ``path`` into a frame with the types of :mod:`bremen.schema`."""
+    table = pa.Table.from_batches(list(iter_batches(path, block_size)))
+    table = table.unify_dictionaries()
+
+    # categories are sorted, as they would be after ``astype("category")``
+    for name in ["territory_key", "territorial_unit"]:
+        table = table.set_column(
+            table.schema.get_field_index(name), name, _sort_dictionary(table[name])
+        )
+
+    # hand the buffers over column by column instead of consolidating them
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
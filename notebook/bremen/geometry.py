@@ -0,0 +1,158 @@
+"""Boundary layers of ``Verwaltungsgrenzen_HB_BHV``, converted once to GeoParquet.
+
+Each shapefile is read a single time and stored as
+``data/cache/boundaries/<layer>-<hash>.parquet`` (WKB geometry), where the
+hash covers all sidecar files of the layer. Decoded GeoDataFrames are kept
+in a process-wide memo, so switching between levels in the dashboard never
+reaches the shapefile reader. geopandas (and pyogrio) are only imported
+once a layer has to be converted or decoded: the extent of a converted
+layer is read from its GeoParquet metadata.
+
+The copies are decoded with pyarrow and shapely rather than
+``gpd.read_parquet``, which parses the PROJJSON of the CRS on every read
+(~60 ms, more than reading the shapefile itself); here each CRS is built
+once per process, from its EPSG code where it has one.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pyarrow.parquet as pq
+
+from . import BOUNDARY_DIR, CACHE_DIR
+from .files import replacing, supersede
+from .profiling import profiled
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+# territory level in the dashboard -> layer name without the city suffix
+LEVELS = {
+    "Stadtteil": "hb_stadtteile",
+    "Ortsteil": "hb_ortsteile",
+    "Stadtbezirk": "hb_stadtbezirke",
+}
+
+SIDECARS = [".shp", ".shx", ".dbf", ".prj", ".cpg"]
+
+_memo = {}
+_digests = {}
+_crs = {}
+
+
+def layers(boundary_dir=BOUNDARY_DIR) -> list[str]:
+    return sorted(path.stem for path in Path(boundary_dir).glob("*.shp"))
+
+
+def _sidecars(layer: str, boundary_dir) -> list[Path]:
+    paths = [Path(boundary_dir) / f"{layer}{suffix}" for suffix in SIDECARS]
+    return [path for path in paths if path.exists()]
+
+
+def _stamp(layer: str, boundary_dir) -> tuple:
+    # mtimes and sizes are enough to notice a replaced shapefile
+    return tuple(
+        (path.suffix, path.stat().st_mtime_ns, path.stat().st_size)
+        for path in _sidecars(layer, boundary_dir)
+    )
+
+
+def layer_digest(layer: str, boundary_dir=BOUNDARY_DIR) -> str:
+    """sha256 of the sidecar files, only re-hashed when their stamps change."""
+    key = (str(Path(boundary_dir).resolve()), layer)
+    stamp = _stamp(layer, boundary_dir)
+    if key not in _digests or _digests[key][0] != stamp:
+        digest = hashlib.sha256()
+        for path in _sidecars(layer, boundary_dir):
+            digest.update(path.suffix.encode())
+            digest.update(path.read_bytes())
+        _digests[key] = (stamp, digest.hexdigest())
+    return _digests[key][1]
+
+
+def boundaries_manifest(cache_dir=CACHE_DIR) -> Path:
+    """Current GeoParquet and TopoJSON file of every layer, see :func:`convert`."""
+    return Path(cache_dir) / "boundaries" / "manifest.json"
+
+
+def convert(layer: str, boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR) -> Path:
+    """Make sure the GeoParquet copy of ``layer`` exists and return its path."""
+    digest = layer_digest(layer, boundary_dir)
+    target = Path(cache_dir) / "boundaries" / f"{layer}-{digest[:16]}.parquet"
+
+    if not target.exists():
+        import geopandas as gpd
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        source = Path(boundary_dir) / f"{layer}.shp"
+        with replacing(target) as tmp:
+            gpd.read_file(source, engine="pyogrio").to_parquet(tmp)
+        supersede(boundaries_manifest(cache_dir), f"{layer}.parquet", target)
+
+    return target
+
+
+def convert_all(boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR) -> list[Path]:
+    return [convert(layer, boundary_dir, cache_dir) for layer in layers(boundary_dir)]
+
+
+def _to_crs(projjson: dict | None):
+    if projjson is None:
+        return None
+    key = json.dumps(projjson, sort_keys=True)
+    if key not in _crs:
+        import pyproj
+
+        code = projjson.get("id", {})
+        _crs[key] = (
+            pyproj.CRS.from_epsg(code["code"])
+            if code.get("authority") == "EPSG"
+            else pyproj.CRS.from_json_dict(projjson)
+        )
+    return _crs[key]
+
+
+def read_copy(path) -> "gpd.GeoDataFrame":
+    """Decode a GeoParquet copy written by :func:`convert`."""
+    import geopandas as gpd
+    import shapely
+
+    table = pq.read_table(path)
+    geo = json.loads(table.schema.metadata[b"geo"])
+    column = geo["primary_column"]
+    geometry = shapely.from_wkb(table.column(column).to_numpy(zero_copy_only=False))
+    return gpd.GeoDataFrame(
+        table.drop_columns([column]).to_pandas(),
+        geometry=gpd.GeoSeries(geometry, name=column),
+        crs=_to_crs(geo["columns"][column].get("crs")),
+    )
+
+
+@profiled("geometry.load_layer")
+def load_layer(
+    layer: str, boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR
+) -> "gpd.GeoDataFrame":
+    stamp = _stamp(layer, boundary_dir)
+    key = (str(Path(boundary_dir).resolve()), layer)
+
+    if key not in _memo or _memo[key][0] != stamp:
+        gdf = read_copy(convert(layer, boundary_dir, cache_dir))
+        _memo[key] = (stamp, gdf)
+
+    return _memo[key][1]
+
+
+def load_level(level: str, city: str = "BRE", **kwargs) -> "gpd.GeoDataFrame":
+    return load_layer(f"{LEVELS[level]}_{city}", **kwargs)
+
+
+def layer_bounds(layer: str, boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR) -> tuple:
+    """``total_bounds`` of ``layer`` without decoding its geometries."""
+    path = convert(layer, boundary_dir, cache_dir)
+    geo = json.loads(pq.read_schema(path).metadata[b"geo"])
+    bbox = geo["columns"][geo["primary_column"]].get("bbox")
+    if bbox is None:
+        return tuple(load_layer(layer, boundary_dir, cache_dir).total_bounds)
+    return tuple(bbox)
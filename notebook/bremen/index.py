@@ -0,0 +1,47 @@
+"""Row index over the panel so that a territory selection is a slice."""
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+
+class TerritoryIndex:
+    """Panel rows sorted by (year, territorial_unit, age_group).
+
+    ``rows`` keeps the age groups only, without the ``Insgesamt`` rows.
+    ``offsets`` maps every (year, territorial_unit) to the start and stop of
+    its block of rows, so :meth:`select` never scans the frame.
+    """
+
+    @profiled("index.build")
+    def __init__(self, panel: pd.DataFrame):
+        self.rows = (
+            panel[panel["age_group"] != "Insgesamt"]
+            .sort_values(["year", "territorial_unit", "age_group"], kind="stable")
+            .reset_index(drop=True)
+        )
+
+        year_codes = self.rows["year"].cat.codes.to_numpy()
+        unit_codes = self.rows["territorial_unit"].cat.codes.to_numpy()
+        changed = (year_codes[1:] != year_codes[:-1]) | (
+            unit_codes[1:] != unit_codes[:-1]
+        )
+
+        starts = np.flatnonzero(np.r_[True, changed])
+        stops = np.r_[starts[1:], len(self.rows)]
+        keys = zip(
+            self.rows["year"].iloc[starts].astype(str),
+            self.rows["territorial_unit"].iloc[starts].astype(str),
+        )
+        self.offsets = {
+            key: (int(start), int(stop)) for key, start, stop in zip(keys, starts, stops)
+        }
+
+    @profiled("index.select")
+    def select(self, year: str, territorial_unit: str) -> pd.DataFrame:
+        start, stop = self.offsets[(year, territorial_unit)]
+        return self.rows.iloc[start:stop]
+
+    def territories(self, year: str) -> list[str]:
+        return sorted(unit for y, unit in self.offsets if y == year)
@@ -0,0 +1,107 @@
+"""Parse the GENESIS table 12411-03-03 once and keep a typed Parquet copy.
+
+Every raw file ``12411-03-03-<year>.csv`` is parsed a single time into
+``data/cache/12411-03-03/year=<year>/part-0.parquet``, together with its
+``summary.parquet`` (see :mod:`bremen.summary`). Which partitions are
+up to date is tracked by :class:`bremen.catalog.Catalog`.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from . import CACHE_DIR, TABLE
+from .files import replacing
+from .genesis import read_table
+from .summary import summarize
+
+FILENAME_PATTERN = re.compile(rf"^{TABLE}-(\d{{4}})\.csv$")
+
+# bump when the layout of the partitions changes, forces a re-ingest
+FORMAT_VERSION = 2
+
+
+def year_of(path) -> str:
+    match = FILENAME_PATTERN.match(Path(path).name)
+    if match is None:
+        raise ValueError(f"{path} is not a {TABLE} file")
+    return match.group(1)
+
+
+def read_raw(path) -> pd.DataFrame:
+    """Parse one raw CSV into the typed schema, see :mod:`bremen.genesis`."""
+    return read_table(path)
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path) -> dict:
+    stat = Path(path).stat()
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_digest(path),
+    }
+
+
+def partition_dir(year: str, cache_dir=CACHE_DIR) -> Path:
+    return Path(cache_dir) / TABLE / f"year={year}"
+
+
+def partition_file(path, cache_dir=CACHE_DIR) -> Path:
+    return partition_dir(year_of(path), cache_dir) / "part-0.parquet"
+
+
+def summary_file(path, cache_dir=CACHE_DIR) -> Path:
+    return partition_dir(year_of(path), cache_dir) / "summary.parquet"
+
+
+def is_current(path, entry: dict | None) -> bool:
+    """Check a raw file against its manifest entry.
+
+    mtime and size are compared first; only when they differ is the file
+    hashed, so a touched but unchanged file is not parsed again.
+    """
+    if entry is None or entry.get("format_version") != FORMAT_VERSION:
+        return False
+
+    stat = Path(path).stat()
+    if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return True
+
+    if entry["sha256"] != file_digest(path):
+        return False
+
+    entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    return True
+
+
+def ingest(path, cache_dir=CACHE_DIR) -> dict:
+    """Parse ``path`` into its Parquet partition and return the manifest entry.
+
+    The per-territory summary of the year is materialized next to the data.
+    """
+    frame = read_raw(path)
+
+    target = partition_file(path, cache_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with replacing(target) as tmp:
+        frame.to_parquet(tmp, index=False)
+    with replacing(summary_file(path, cache_dir)) as tmp:
+        summarize(frame).to_parquet(tmp)
+
+    return {
+        "source": str(path),
+        "format_version": FORMAT_VERSION,
+        **fingerprint(path),
+        "rows": len(frame),
+        "schema": {column: str(dtype) for column, dtype in frame.dtypes.items()},
+    }
@@ -0,0 +1,33 @@
+"""Median age group of every territory and measure in one grouped pass."""
+
+import pandas as pd
+
+
+def median_age_groups(
+    df: pd.DataFrame,
+    measures: list[str],
+    by: str = "territorial_unit",
+) -> pd.DataFrame:
+    """Return the age group containing the 50 % point per group and measure.
+
+    ``df`` holds the age group rows of each group in age order (the order of
+    the raw files); ``Insgesamt`` rows are ignored. The result is indexed by
+    ``by`` with one column of age group labels per measure. A group without
+    any population falls back to its first age group.
+    """
+    rows = df[df["age_group"] != "Insgesamt"]
+    groups = rows.groupby(by, sort=False, observed=True)[measures]
+
+    half = groups.transform("sum") / 2
+    crossed = groups.cumsum().gt(half)
+
+    # idxmax on booleans finds the first crossing, or the first row if none
+    first = crossed.groupby(rows[by], sort=False, observed=True).idxmax()
+
+    return pd.DataFrame(
+        {
+            measure: rows["age_group"].loc[first[measure]].to_numpy()
+            for measure in measures
+        },
+        index=first.index,
+    )
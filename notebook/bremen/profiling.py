@@ -0,0 +1,274 @@
+"""Opt-in timing and memory profile of the dashboard.
+
+Set ``BREMEN_PROFILE=1`` before starting marimo. Every cell execution and
+every pipeline stage decorated with :func:`profiled` is then recorded with
+its wall time, CPU time and peak traced allocation, tagged with the widget
+change that triggered the run. Records are kept for the panel in the app
+and appended to ``data/profile/profile.jsonl`` (``BREMEN_PROFILE_LOG``)::
+
+    python -m bremen.profiling data/profile/profile.jsonl
+
+aggregates a log offline. Without ``BREMEN_PROFILE`` the decorator returns
+the function unchanged and nothing is hooked into marimo.
+
+Cells are timed through ``marimo._runtime.runner.hooks``, a private marimo
+API that the ``^0.8`` pin in ``pyproject.toml`` keeps stable; if it moves,
+:meth:`Profiler.install` returns False and only the stages are recorded.
+The hook lists are global to the process, and ``marimo run`` runs every
+session's kernel as a thread of one process, so everything a run is
+attributed to (records, trigger, widget state, open measurements) is kept
+per thread. Peak allocation comes from ``tracemalloc``, which is process
+wide: with concurrent sessions the peaks include each other's allocations.
+"""
+
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from . import ROOT_DIR
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ENABLED = os.environ.get("BREMEN_PROFILE", "") not in ("", "0")
+LOG_FILE = Path(
+    os.environ.get("BREMEN_PROFILE_LOG", ROOT_DIR / "data" / "profile" / "profile.jsonl")
+)
+
+
+class _Session(threading.local):
+    """What the profiler knows about the session running on this thread."""
+
+    def __init__(self, keep: int):
+        self.records = deque(maxlen=keep)
+        self.trigger = ["startup"]
+        self.widgets = {}
+        self.state = {}
+        self.open = {}
+        # running peaks of the enclosing measurements, innermost last
+        self.peaks = []
+
+
+class Profiler:
+    def __init__(self, log_file=LOG_FILE, keep: int = 500):
+        self.log_file = Path(log_file)
+        self._session = _Session(keep)
+        self._lock = threading.Lock()
+
+    @property
+    def records(self) -> deque:
+        return self._session.records
+
+    def _start(self) -> dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        peaks = self._session.peaks
+        current, peak = tracemalloc.get_traced_memory()
+        if peaks:
+            peaks[-1] = max(peaks[-1], peak)
+        tracemalloc.reset_peak()
+        peaks.append(current)
+        return {"wall": time.perf_counter(), "cpu": time.process_time(), "base": current}
+
+    def _stop(self, kind: str, name: str, started: dict) -> dict:
+        wall = time.perf_counter() - started["wall"]
+        cpu = time.process_time() - started["cpu"]
+        session = self._session
+        peak = max(session.peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if session.peaks:
+            session.peaks[-1] = max(session.peaks[-1], peak)
+
+        record = {
+            "time": time.time(),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "kind": kind,
+            "name": name,
+            "trigger": session.trigger,
+            "state": session.state,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "peak_bytes": peak - started["base"],
+        }
+        session.records.append(record)
+        with self._lock:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        return record
+
+    @contextmanager
+    def stage(self, name: str, kind: str = "stage"):
+        started = self._start()
+        try:
+            yield
+        finally:
+            self._stop(kind, name, started)
+
+    def _widget_state(self) -> dict:
+        return {
+            name: str(widget.value) for name, widget in self._session.widgets.items()
+        }
+
+    def watch(self, **widgets):
+        """Widgets of this session whose changes are reported as the trigger
+        of a run."""
+        session = self._session
+        session.widgets = widgets
+        if not session.state:
+            session.state = self._widget_state()
+
+    def _detect_trigger(self, runner):
+        session = self._session
+        state = self._widget_state()
+        session.trigger = [
+            name for name, value in state.items() if session.state.get(name) != value
+        ]
+        session.state = state
+
+    def _before_cell(self, cell, runner):
+        # the kernel copies the other hook lists into each runner, so the
+        # run that calls install() only sees this hook, not the one after
+        if self._after_cell in runner.post_execution_hooks:
+            self._session.open[cell.cell_id] = self._start()
+
+    def _after_cell(self, cell, runner, result):
+        started = self._session.open.pop(cell.cell_id, None)
+        if started is not None:
+            self._stop("cell", cell_name(cell), started)
+
+    def install(self) -> bool:
+        """Hook into the marimo kernel; only with ``BREMEN_PROFILE`` set."""
+        if not ENABLED:
+            return False
+        try:
+            from marimo._runtime.runner import hooks
+        except ImportError:
+            return False
+        names = ("PREPARATION_HOOKS", "PRE_EXECUTION_HOOKS", "POST_EXECUTION_HOOKS")
+        if not all(isinstance(getattr(hooks, name, None), list) for name in names):
+            return False
+
+        # the kernel builds every runner from these lists, so cells are
+        # timed from the first widget interaction on
+        for hook_list, hook in [
+            (hooks.PREPARATION_HOOKS, self._detect_trigger),
+            (hooks.PRE_EXECUTION_HOOKS, self._before_cell),
+            (hooks.POST_EXECUTION_HOOKS, self._after_cell),
+        ]:
+            if not any(getattr(h, "__self__", None) is self for h in hook_list):
+                hook_list.append(hook)
+        return True
+
+    def frame(self) -> "pd.DataFrame":
+        return records_frame(list(self.records))
+
+    def panel(self):
+        import marimo as mo
+
+        frame = self.frame()
+        if frame.empty:
+            return mo.md("No executions recorded yet.")
+        last = frame.tail(40)
+        return mo.vstack(
+            [
+                mo.md(f"Log: `{self.log_file}`"),
+                mo.ui.tabs(
+                    {
+                        "Latest": mo.ui.table(
+                            last[["kind", "name", "trigger", "wall_ms", "cpu_ms", "peak_kb"]]
+                            .iloc[::-1]
+                            .reset_index(drop=True),
+                            selection=None,
+                        ),
+                        "By name": mo.ui.table(aggregate(frame).reset_index(), selection=None),
+                    }
+                ),
+            ]
+        )
+
+
+def cell_name(cell) -> str:
+    """Cells are all called ``__``, name them by what they define."""
+    defs = sorted(name for name in cell.defs if not name.startswith("_"))
+    if defs:
+        return ", ".join(defs)
+    lines = [line.strip() for line in cell.code.splitlines() if line.strip()]
+    return lines[-1][:40] if lines else cell.cell_id
+
+
+def records_frame(records: list[dict]) -> "pd.DataFrame":
+    # pandas is only needed to show records, not to take them
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records)
+    if frame.empty:
+        return frame
+    return frame.assign(
+        trigger=frame["trigger"].map(", ".join),
+        wall_ms=frame["wall_s"] * 1000,
+        cpu_ms=frame["cpu_s"] * 1000,
+        peak_kb=frame["peak_bytes"] / 1024,
+    ).round({"wall_ms": 2, "cpu_ms": 2, "peak_kb": 1})
+
+
+def aggregate(frame: "pd.DataFrame", by=("kind", "name")) -> "pd.DataFrame":
+    return (
+        frame.groupby(list(by))
+        .agg(
+            runs=("wall_ms", "size"),
+            wall_ms=("wall_ms", "mean"),
+            wall_p95_ms=("wall_ms", lambda x: x.quantile(0.95)),
+            cpu_ms=("cpu_ms", "mean"),
+            peak_kb=("peak_kb", "max"),
+        )
+        .round(2)
+        .sort_values("wall_ms", ascending=False)
+    )
+
+
+profiler = Profiler()
+
+
+def profiled(name: str):
+    """Record every call of the decorated function as a pipeline stage."""
+
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with profiler.stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Aggregate a profile log.")
+    parser.add_argument("log", type=Path, nargs="?", default=LOG_FILE)
+    parser.add_argument("--by-trigger", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.log) as f:
+        frame = records_frame([json.loads(line) for line in f])
+    by = ("trigger", "kind", "name") if args.by_trigger else ("kind", "name")
+    with pd.option_context("display.width", 160, "display.max_rows", 200):
+        print(aggregate(frame, by))
+
+
+if __name__ == "__main__":
+    main()
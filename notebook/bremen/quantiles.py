@@ -0,0 +1,204 @@
+"""Quantiles of the age distribution of every territory, measure and year.
+
+:class:`AgeDistribution` arranges the age group counts of a panel in one
+array shaped ``[year, territory, measure, age_group]`` and its cumulative
+shares. Any set of quantiles is then answered for all cells at once: the
+cumulative shares of every cell are offset by the cell's position, so one
+``searchsorted`` over the flattened array finds the age group of every
+cell and quantile, and the age is interpolated linearly within the group::
+
+    ages = AgeDistribution(catalog.load_panel())
+    ages.frame(ages.quantile_ages([0.25, 0.5, 0.75]))
+
+The open last group (``90 und mehr``) is taken to end at ``OPEN_END``.
+
+    python -m bremen.quantiles --quantiles 0.1 0.5 0.9 -o report.csv
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .catalog import Catalog
+from .profiling import profiled
+from .schema import AGE_GROUPS, COUNT_COLUMNS
+
+OPEN_END = 100
+
+GROUPS = AGE_GROUPS[:-1]  # without "Insgesamt"
+
+
+def age_bounds(labels=GROUPS) -> np.ndarray:
+    """Lower and upper age of each age group label, shaped ``[group, 2]``."""
+    bounds = []
+    for label in labels:
+        numbers = [int(n) for n in re.findall(r"\d+", label)]
+        if label.startswith("unter"):
+            bounds.append((0, numbers[0]))
+        elif "mehr" in label:
+            bounds.append((numbers[0], OPEN_END))
+        else:
+            bounds.append(tuple(numbers))
+    return np.array(bounds, dtype="float64")
+
+
+BOUNDS = age_bounds()
+
+# dependency ratios: age groups below 15, 15 to 65 and from 65 on
+YOUNG = BOUNDS[:, 1] <= 15
+OLD = BOUNDS[:, 0] >= 65
+WORKING = ~(YOUNG | OLD)
+
+
+class AgeDistribution:
+    @profiled("quantiles.build")
+    def __init__(self, panel: pd.DataFrame, measures=COUNT_COLUMNS):
+        self.measures = list(measures)
+
+        years = panel["year"].astype("category").cat.remove_unused_categories()
+        units = panel["territorial_unit"].astype("category").cat.remove_unused_categories()
+        self.years = list(years.cat.categories.astype(str))
+        self.territories = list(units.cat.categories.astype(str))
+        year_codes, unit_codes = years.cat.codes.to_numpy(), units.cat.codes.to_numpy()
+
+        # territories reported in a year, even if all their counts are
+        # suppressed; the counts of the others stay all zero
+        self.observed = np.zeros((len(self.years), len(self.territories)), dtype=bool)
+        self.observed[year_codes, unit_codes] = True
+
+        groups = (panel["age_group"] != "Insgesamt").to_numpy()
+        self.counts = np.zeros(
+            (len(self.years), len(self.territories), len(self.measures), len(GROUPS)),
+            dtype="int64",
+        )
+        self.counts[
+            year_codes[groups],
+            unit_codes[groups],
+            :,
+            panel["age_group"].cat.codes.to_numpy()[groups],
+        ] = panel.loc[groups, self.measures].to_numpy()
+
+        self.totals = self.counts.sum(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.shares = np.cumsum(self.counts, axis=-1) / self.totals[..., None]
+
+    def _search(self, quantiles, side: str) -> np.ndarray:
+        """Age group of every cell and quantile, shaped ``[cell, quantile]``."""
+        quantiles = np.asarray(quantiles, dtype="float64")
+        shares = self.shares.reshape(-1, len(GROUPS))
+        cells = np.arange(len(shares))
+
+        # cell i occupies [i, i + 1], so the flattened shares are sorted;
+        # empty cells (NaN shares) are pushed past their quantiles
+        keys = (np.nan_to_num(shares, nan=1.0) + cells[:, None]).ravel()
+        targets = (quantiles[None, :] + cells[:, None]).ravel()
+        found = np.searchsorted(keys, targets, side=side).reshape(len(shares), -1)
+        found -= cells[:, None] * len(GROUPS)
+        return np.clip(found, 0, len(GROUPS) - 1)
+
+    def _shape(self, values: np.ndarray) -> np.ndarray:
+        return values.reshape(self.totals.shape + values.shape[-1:])
+
+    @profiled("quantiles.quantile_groups")
+    def quantile_groups(self, quantiles) -> np.ndarray:
+        """Index of the age group in which each quantile is exceeded.
+
+        Shaped ``[year, territory, measure, quantile]``; for 0.5 this is the
+        group of :func:`bremen.medians.median_age_groups`, and empty cells
+        fall back to the first group like there.
+        """
+        groups = self._search(quantiles, side="right")
+        empty = self.totals.reshape(-1) == 0
+        groups[empty] = 0
+        return self._shape(groups)
+
+    @profiled("quantiles.quantile_ages")
+    def quantile_ages(self, quantiles) -> np.ndarray:
+        """Quantile ages interpolated within the age groups, NaN for empty cells."""
+        quantiles = np.asarray(quantiles, dtype="float64")
+        groups = self._search(quantiles, side="left")
+
+        shares = self.shares.reshape(-1, len(GROUPS))
+        upper = np.take_along_axis(shares, groups, axis=1)
+        below = np.where(
+            groups > 0, np.take_along_axis(shares, np.maximum(groups - 1, 0), axis=1), 0.0
+        )
+        lower_age, upper_age = BOUNDS[groups, 0], BOUNDS[groups, 1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            within = np.clip((quantiles[None, :] - below) / (upper - below), 0, 1)
+        ages = lower_age + np.nan_to_num(within) * (upper_age - lower_age)
+        ages[np.isnan(upper)] = np.nan
+        return self._shape(ages)
+
+    def dependency_ratios(self) -> dict[str, np.ndarray]:
+        """Young (<15), old (65+) and total per 100 aged 15 to 65.
+
+        Each is shaped ``[year, territory, measure]``.
+        """
+        working = self.counts[..., WORKING].sum(axis=-1)
+        young = self.counts[..., YOUNG].sum(axis=-1)
+        old = self.counts[..., OLD].sum(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "young_dependency": 100 * young / working,
+                "old_dependency": 100 * old / working,
+                "dependency": 100 * (young + old) / working,
+            }
+
+    def frame(self, values: np.ndarray, suffixes=("",)) -> pd.DataFrame:
+        """Wide frame of a ``[year, territory, measure(, quantile)]`` array.
+
+        Indexed by (year, territorial_unit), one column ``<measure><suffix>``
+        per measure and entry of the last axis; rows of territories missing
+        in a year are dropped, those reported with all counts zero are kept.
+        """
+        if values.ndim == 3:
+            values = values[..., None]
+
+        index = pd.MultiIndex.from_product(
+            [self.years, self.territories], names=["year", "territorial_unit"]
+        )
+        columns = [f"{m}{suffix}" for m in self.measures for suffix in suffixes]
+        frame = pd.DataFrame(values.reshape(len(index), -1), index=index, columns=columns)
+        return frame[self.observed.reshape(-1)]
+
+
+def report(
+    distribution: AgeDistribution, quantiles=(0.25, 0.5, 0.75)
+) -> pd.DataFrame:
+    """Quantile ages, median age groups and dependency ratios in one table."""
+    ages = distribution.frame(
+        distribution.quantile_ages(quantiles),
+        [f"_age_p{q * 100:g}" for q in quantiles],
+    )
+    medians = distribution.frame(distribution.quantile_groups([0.5])[..., 0])
+    medians = medians.apply(lambda c: pd.Categorical.from_codes(c, GROUPS, ordered=True))
+    ratios = [
+        distribution.frame(values).add_suffix(f"_{name}")
+        for name, values in distribution.dependency_ratios().items()
+    ]
+    return pd.concat([ages, medians.add_prefix("median_group_"), *ratios], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Age quantiles of every territory.")
+    parser.add_argument("--quantiles", type=float, nargs="+", default=[0.25, 0.5, 0.75])
+    parser.add_argument("--years", nargs="*", help="default: all years of the catalog")
+    parser.add_argument("-o", "--output", type=Path, help="CSV file, default stdout")
+    args = parser.parse_args()
+
+    catalog = Catalog()
+    catalog.refresh()
+    table = report(AgeDistribution(catalog.load_panel(args.years)), args.quantiles)
+    if args.output:
+        table.to_csv(args.output)
+    else:
+        print(table.to_csv())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Column types of the parsed 12411-03-03 data."""
+
+import pandas as pd
+
+AGE_GROUPS = [
+    "unter 3",
+    "3 - 6",
+    "6 - 10",
+    "10 - 15",
+    "15 - 18",
+    "18 - 20",
+    "20 - 25",
+    "25 - 30",
+    "30 - 35",
+    "35 - 40",
+    "40 - 45",
+    "45 - 50",
+    "50 - 55",
+    "55 - 60",
+    "60 - 65",
+    "65 - 70",
+    "70 - 75",
+    "75 - 80",
+    "80 - 85",
+    "85 - 90",
+    "90 und mehr",
+    "Insgesamt",
+]
+
+AGE_GROUP_DTYPE = pd.CategoricalDtype(AGE_GROUPS, ordered=True)
+
+COUNT_DTYPE = "int32"
+
+DTYPES = {
+    "territory_key": "category",
+    "territorial_unit": "category",
+    "date": "datetime64[ns]",
+    "age_group": AGE_GROUP_DTYPE,
+    "population_total": COUNT_DTYPE,
+    "population_male": COUNT_DTYPE,
+    "population_female": COUNT_DTYPE,
+    "german_total": COUNT_DTYPE,
+    "german_male": COUNT_DTYPE,
+    "german_female": COUNT_DTYPE,
+    "foreigner_total": COUNT_DTYPE,
+    "foreigner_male": COUNT_DTYPE,
+    "foreigner_female": COUNT_DTYPE,
+}
+
+COLUMNS = list(DTYPES)
+
+COUNT_COLUMNS = [column for column, dtype in DTYPES.items() if dtype == COUNT_DTYPE]
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype(DTYPES)
@@ -0,0 +1,170 @@
+"""Precomputed default view of the dashboard for a fast cold start.
+
+A new session opens on the newest year, Stadt Bremen and the Stadtteil
+map. That view is stored in ``data/cache/snapshot/default-view.json``: the
+summary row of Stadt Bremen and the Vega-Lite specs of its pyramids and of
+the map. Checking and reading it only needs ``json`` and a few ``stat``
+calls, so the notebook shows it from its first cell, while pandas and the
+catalog are still loading; the live dashboard then takes its place.
+
+The snapshot records a key of its inputs: the hashes of the raw files in
+the catalog manifest and the stamps of the boundary files. :func:`load`
+returns None when they changed or the raw files no longer match the
+manifest, and the notebook writes a new snapshot once the live dashboard
+is up.
+
+    python -m bremen.snapshot
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import marimo as mo
+
+from . import BOUNDARY_DIR, CACHE_DIR, RAW_DIR, TABLE, widgets
+from .files import write_text
+
+# bump when the stored view changes, invalidates existing snapshots
+SNAPSHOT_VERSION = 4
+
+TERRITORY = "Stadt Bremen"
+LEVEL = "Stadtteil"
+MAP_WIDTH, MAP_HEIGHT = 600, 400
+
+
+def snapshot_file(cache_dir=CACHE_DIR) -> Path:
+    return Path(cache_dir) / "snapshot" / "default-view.json"
+
+
+def inputs_key(
+    raw_dir=RAW_DIR, cache_dir=CACHE_DIR, boundary_dir=BOUNDARY_DIR
+) -> str | None:
+    """Digest of everything the default view is rendered from.
+
+    None when the catalog has to be refreshed first: no manifest yet, or
+    raw files added, removed or touched since it was written.
+    """
+    manifest_file = Path(cache_dir) / TABLE / "manifest.json"
+    if not manifest_file.exists():
+        return None
+    manifest = json.loads(manifest_file.read_text())
+
+    raw = {str(path): path.stat() for path in Path(raw_dir).glob(f"{TABLE}-*.csv")}
+    for entry in manifest.values():
+        stat = raw.pop(entry["source"], None)
+        if stat is None or stat.st_mtime_ns != entry["mtime_ns"]:
+            return None
+    if raw:
+        return None
+
+    boundaries = [
+        (path.name, path.stat().st_mtime_ns, path.stat().st_size)
+        for path in sorted(Path(boundary_dir).iterdir())
+    ]
+    sources = {
+        year: [entry["sha256"], entry["format_version"]]
+        for year, entry in manifest.items()
+    }
+    parts = [SNAPSHOT_VERSION, sources, boundaries]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def load(raw_dir=RAW_DIR, cache_dir=CACHE_DIR, boundary_dir=BOUNDARY_DIR) -> dict | None:
+    """The stored default view, None if missing or stale."""
+    path = snapshot_file(cache_dir)
+    if not path.exists():
+        return None
+    snapshot = json.loads(path.read_text())
+    if snapshot.get("key") != inputs_key(raw_dir, cache_dir, boundary_dir):
+        return None
+    return snapshot
+
+
+def build(catalog=None, backend=None) -> Path:
+    """Render the default view and store it as the snapshot."""
+    # the rendering pipeline is only needed here, not to show a snapshot
+    from .backends import open_backend
+    from .catalog import Catalog
+    from .charts import MAP_FEATURES, SERIES, age_pyramids, choropleth
+    from .schema import COUNT_COLUMNS
+    from .summary import SHARES, UNIT_COLUMNS
+    from .topology import load_topojson, with_properties
+
+    catalog = catalog or Catalog()
+    backend = backend or open_backend(catalog)
+    year = max(catalog.years)
+
+    selection = backend.summary_row(year, TERRITORY)
+    rows = backend.rows(year, TERRITORY)
+    pyramids = {
+        title: age_pyramids(rows, selection, series).to_dict()
+        for series, title in SERIES.items()
+    }
+
+    unit = UNIT_COLUMNS[LEVEL]
+    table = backend.map_table(year, LEVEL)[[unit] + list(MAP_FEATURES.values())]
+    topology = with_properties(load_topojson(LEVEL, MAP_WIDTH, MAP_HEIGHT), table, unit)
+    map_spec = choropleth(
+        topology, LEVEL, unit, width=MAP_WIDTH, height=MAP_HEIGHT
+    ).to_dict()
+
+    snapshot = {
+        "key": inputs_key(catalog.raw_dir, catalog.cache_dir),
+        "year": year,
+        "territory": TERRITORY,
+        "level": LEVEL,
+        "selection": {
+            **{column: int(selection[column]) for column in COUNT_COLUMNS},
+            **{column: float(selection[column]) for column in SHARES},
+        },
+        "pyramids": pyramids,
+        "map": map_spec,
+    }
+
+    path = snapshot_file(catalog.cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # concurrent sessions may both find the snapshot stale and write it
+    write_text(path, json.dumps(snapshot))
+    return path
+
+
+def view(snapshot: dict) -> mo.Html:
+    """The stored view in the layout of the live dashboard."""
+    return mo.vstack(
+        [
+            mo.callout(
+                mo.md(
+                    f"{snapshot['territory']}, {snapshot['year']}: "
+                    "the controls appear as soon as the data is loaded."
+                ),
+                kind="info",
+            ),
+            widgets.dashboard(
+                widgets.stats_grid(snapshot["selection"]),
+                widgets.chart(snapshot["map"]),
+                mo.ui.tabs(
+                    {
+                        title: widgets.chart(spec)
+                        for title, spec in snapshot["pyramids"].items()
+                    }
+                ),
+            ),
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store the startup view.")
+    parser.parse_args()
+
+    from .catalog import Catalog
+
+    catalog = Catalog()
+    catalog.refresh()
+    print(build(catalog))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Point-in-territory lookup over the Bremen and Bremerhaven layers.
+
+The ``_BRE`` and ``_BHV`` layers of a level are merged into one layer
+(``_BHV`` uses upper case column names, and carries the Bremerhaven part
+of the Stadt Bremen port area, which is merged into its Stadtteil and
+Stadtbezirk). A :class:`TerritoryLocator` cuts every territory along a
+``GRID`` metre grid and builds an STRtree over the pieces on the first
+lookup: most pieces are plain rectangles, so the point-in-polygon tests
+behind a hit stay cheap however detailed the borders are. Whole
+coordinate arrays are classified in one query::
+
+    locator = TerritoryLocator("Ortsteil")
+    keys = locator.lookup(x, y)      # territory keys, None outside
+
+Keys are returned in the form of ``territory_key`` in the raw data
+(``04011111`` for an Ortsteil, ``0401111`` for a Stadtteil, ``040111`` for
+a Stadtbezirk). Keys in Stadt Bremen (``04011…``) join onto the panel;
+the raw data has Bremerhaven only as a whole city (``04012``), so keys
+there have no rows of their own, and their first five digits are the key
+to join on. Coordinates are in the
+CRS of the layers, ETRS89 / UTM 32N. :func:`lookup_parallel` splits large
+arrays over a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from itertools import repeat
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from . import BOUNDARY_DIR, CACHE_DIR
+from .geometry import load_level
+
+CITIES = ("BRE", "BHV")
+
+# level -> (key column, name column) in the boundary layers
+KEY_COLUMNS = {
+    "Ortsteil": ("sch_ot", "bez_ot"),
+    "Stadtteil": ("sch", "bez_st"),
+    "Stadtbezirk": ("sch_sb", "bez_sb"),
+}
+
+# length of a territory_key on each level, the layer keys are padded with 0
+KEY_LENGTHS = {"Ortsteil": 8, "Stadtteil": 7, "Stadtbezirk": 6}
+
+# metres; 1 km pieces were about 3x faster than whole territories
+GRID = 1000.0
+
+CHUNK_SIZE = 250_000
+
+_locators = {}
+
+
+def merged_level(
+    level: str, boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR
+) -> gpd.GeoDataFrame:
+    """One layer of ``level`` for both cities, one row per territory key."""
+    key, name = KEY_COLUMNS[level]
+    frames = []
+    for city in CITIES:
+        layer = load_level(level, city, boundary_dir=boundary_dir, cache_dir=cache_dir)
+        layer = layer.rename(columns=str.lower).set_geometry("geometry")
+        frames.append(layer[[key, name, "geometry"]].assign(city=city))
+
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.dissolve(key, aggfunc="first", as_index=False, sort=True)
+    return merged.assign(territory_key=merged[key].str[: KEY_LENGTHS[level]])
+
+
+class TerritoryLocator:
+    def __init__(self, level: str, boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR):
+        self.level = level
+        self.boundary_dir = boundary_dir
+        self.cache_dir = cache_dir
+
+    @cached_property
+    def territories(self) -> gpd.GeoDataFrame:
+        return merged_level(self.level, self.boundary_dir, self.cache_dir)
+
+    @cached_property
+    def _pieces(self) -> tuple[shapely.STRtree, np.ndarray]:
+        geometries = self.territories.geometry.values
+        x0, y0, x1, y1 = self.territories.total_bounds
+        gx, gy = np.meshgrid(np.arange(x0, x1, GRID), np.arange(y0, y1, GRID))
+        cells = shapely.box(gx.ravel(), gy.ravel(), gx.ravel() + GRID, gy.ravel() + GRID)
+
+        rows, cell_ids = shapely.STRtree(cells).query(geometries, predicate="intersects")
+        pieces = shapely.intersection(geometries[rows], cells[cell_ids])
+        keep = ~shapely.is_empty(pieces)
+        return shapely.STRtree(pieces[keep]), rows[keep]
+
+    @property
+    def tree(self) -> shapely.STRtree:
+        return self._pieces[0]
+
+    @cached_property
+    def _keys(self) -> np.ndarray:
+        # position len(territories) is the miss, it maps to None
+        return np.append(self.territories["territory_key"].to_numpy(object), None)
+
+    def lookup_index(self, x, y) -> np.ndarray:
+        """Row of ``territories`` containing each point, -1 outside.
+
+        Points on a shared border go to the territory listed first.
+        """
+        points = shapely.points(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        tree, owners = self._pieces
+        hits, pieces = tree.query(points, predicate="intersects")
+        rows = owners[pieces]
+
+        result = np.full(len(points), -1, dtype=np.int64)
+        # several hits per point only happen on borders, keep the first row
+        order = np.lexsort((rows, hits))
+        hits, rows = hits[order], rows[order]
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = hits[1:] != hits[:-1]
+        result[hits[first]] = rows[first]
+        return result
+
+    def lookup(self, x, y) -> np.ndarray:
+        """Territory key of each point, None for points outside both cities."""
+        return self._keys[self.lookup_index(x, y)]
+
+
+def locator(level: str, boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR):
+    """Shared locator of ``level``, built once per process."""
+    key = (level, str(boundary_dir), str(cache_dir))
+    if key not in _locators:
+        _locators[key] = TerritoryLocator(level, boundary_dir, cache_dir)
+    return _locators[key]
+
+
+def _lookup_chunk(level, x, y, boundary_dir, cache_dir) -> np.ndarray:
+    return locator(level, boundary_dir, cache_dir).lookup(x, y)
+
+
+def lookup_parallel(
+    level: str,
+    x,
+    y,
+    max_workers=None,
+    chunk_size: int = CHUNK_SIZE,
+    boundary_dir=BOUNDARY_DIR,
+    cache_dir=CACHE_DIR,
+) -> np.ndarray:
+    """:meth:`TerritoryLocator.lookup` over a process pool, chunk by chunk."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x) <= chunk_size:
+        return locator(level, boundary_dir, cache_dir).lookup(x, y)
+
+    bounds = range(0, len(x), chunk_size)
+    with ProcessPoolExecutor(max_workers) as pool:
+        parts = pool.map(
+            _lookup_chunk,
+            repeat(level),
+            (x[start : start + chunk_size] for start in bounds),
+            (y[start : start + chunk_size] for start in bounds),
+            repeat(boundary_dir),
+            repeat(cache_dir),
+        )
+        return np.concatenate(list(parts))
+
+
+def locate(x, y, levels=tuple(KEY_COLUMNS), **kwargs) -> pd.DataFrame:
+    """Territory keys of every point on each of ``levels``."""
+    return pd.DataFrame({level: lookup_parallel(level, x, y, **kwargs) for level in levels})
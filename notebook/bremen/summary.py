@@ -0,0 +1,98 @@
+"""Per-territory summary table, materialized once per year at ingest.
+
+One row per territorial unit with the nine population counts, the shares
+shown by the stats widgets and the map, and the median age group of every
+count column. The dashboard only looks rows up in this table.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .medians import median_age_groups
+from .profiling import profiled
+from .schema import AGE_GROUP_DTYPE, COUNT_COLUMNS
+
+MEASURES = COUNT_COLUMNS
+
+# share column -> (numerator, denominator)
+SHARES = {
+    "percentage_foreigner": ("foreigner_total", "population_total"),
+    "percentage_german": ("german_total", "population_total"),
+    "percentage_male": ("population_male", "population_total"),
+    "percentage_female": ("population_female", "population_total"),
+    "percentage_foreigner_female": ("foreigner_female", "population_female"),
+    "percentage_german_female": ("german_female", "population_female"),
+    "percentage_foreigner_male": ("foreigner_male", "population_male"),
+    "percentage_german_male": ("german_male", "population_male"),
+}
+
+# territory level -> column of the boundary layer holding the unit name
+UNIT_COLUMNS = {
+    "Stadtteil": "bez_st",
+    "Ortsteil": "bez_ot",
+    "Stadtbezirk": "bez_sb",
+}
+
+
+def summarize(df: pd.DataFrame) -> pd.DataFrame:
+    """Summarize the rows of one year, indexed by ``territorial_unit``."""
+    rows = df[df["age_group"] != "Insgesamt"]
+    totals = rows.groupby("territorial_unit", observed=True)[MEASURES].sum()
+    totals.index = totals.index.astype(str)
+
+    shares = pd.DataFrame(
+        {
+            name: 100 / totals[denominator] * totals[numerator]
+            for name, (numerator, denominator) in SHARES.items()
+        }
+    )
+
+    medians = (
+        median_age_groups(rows, MEASURES).astype(AGE_GROUP_DTYPE).add_prefix("median_")
+    )
+    medians.index = medians.index.astype(str)
+
+    return pd.concat([totals, shares, medians], axis=1)
+
+
+def column_totals(rows: pd.DataFrame, by=None) -> pd.DataFrame:
+    """Sum of every count column, per row's group of ``by`` if given.
+
+    Without ``by`` this is a single row of totals that broadcasts over
+    ``rows``; with ``by`` every row carries the totals of its group.
+    """
+    if by is None:
+        return rows[MEASURES].sum().to_frame().T
+    return rows.groupby(by, sort=False, observed=True)[MEASURES].transform("sum")
+
+
+@profiled("summary.with_percentages")
+def with_percentages(rows: pd.DataFrame, by=None) -> pd.DataFrame:
+    """Add the share of every age group in each count column of ``rows``.
+
+    All column totals are taken in one pass and all shares are computed as
+    one block, so ``rows`` is copied once. Pass ``by`` (e.g. ``["year",
+    "territorial_unit"]``) when ``rows`` spans several selections.
+    """
+    counts = rows[MEASURES].to_numpy(dtype="float64")
+    totals = column_totals(rows, by).to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = 100 / totals * counts
+
+    percentages = pd.DataFrame(
+        shares,
+        index=rows.index,
+        columns=[f"percentage_{column}" for column in MEASURES],
+    )
+    return pd.concat([rows, percentages], axis=1)
+
+
+@profiled("summary.map_table")
+def map_table(summary: pd.DataFrame, year: str, level: str) -> pd.DataFrame:
+    """Summary rows of one level in one year, keyed like the boundary layer."""
+    table = summary.loc[year]
+    table = table[table.index.str.contains(level, regex=False)].reset_index()
+
+    unit = UNIT_COLUMNS[level]
+    table[unit] = table["territorial_unit"].str.split("(").str.get(0).str.strip()
+    return table
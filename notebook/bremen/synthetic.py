@@ -0,0 +1,345 @@
+"""Synthetic 12411-03-03 exports and boundary layers for scale testing.
+
+    python -m bremen.synthetic /tmp/synthetic --scale 100 --years 20
+
+writes ``<out>/raw/12411-03-03-<year>.csv`` in the exact layout of the
+GENESIS export (ISO-8859-1, ``;``, CRLF, title and three header lines,
+``x`` for suppressed territories, the footnote footer) and
+``<out>/Verwaltungsgrenzen_HB_BHV/hb_{ortsteile,stadtteile,stadtbezirke}_BRE``
+shapefiles with the columns of the real layers. ``--scale 1`` matches the
+size of the real data (87 Ortsteile, 21 age groups).
+
+The Ortsteile are a Voronoi tessellation of random points; Stadtteile and
+Stadtbezirke are unions of neighbouring Ortsteile, so all levels form gap
+free coverages with shared edges, like the real layers. Point the pipeline
+at the output with ``Catalog(out / "raw", out / "cache")`` and
+``boundary_dir=out / "Verwaltungsgrenzen_HB_BHV"``.
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from .ingest import TABLE
+from .schema import AGE_GROUPS, COUNT_COLUMNS
+
+TITLE = (
+    f"{TABLE}: Bevölkerung nach Geschlecht, Nationalität und Altersgruppen"
+    " bis 90+ (Stand  31.12.)"
+)
+HEADER = [
+    TITLE,
+    "Gebietsschlüssel;Gebietseinheit;Zeit;Alter von ... bis unter ... Jahren;"
+    + ";".join(["Bevölkerung 1)"] * 9),
+    ";;;;insgesamt;männlich;weiblich;Deutsche;Deutsche;Deutsche;"
+    "Ausländer 2);Ausländer 2);Ausländer 2)",
+    ";;;;;;;zusammen;männlich;weiblich;zusammen;männlich;weiblich",
+]
+FOOTER = [
+    "",
+    "*) Die Ergebnisse der Wanderungsstatistik und die Entwicklung des"
+    " Bevölkerungsstandes ab dem Berichtsjahr 2016 sind aufgrund methodischer"
+    " Änderungen, technischer Weiterentwicklungen der Datenlieferungen aus dem"
+    " Meldewesen an die Statistik sowie der Umstellung auf ein neues"
+    " statistisches Aufbereitungsverfahren nur bedingt mit den Vorjahreswerten"
+    " vergleichbar.",
+    "",
+    "1) Quelle: 1939-05-17, 1950-09-13, 1961-06-06, 1970-05-27 und 1987-05-25:"
+    " Volkszählungen (1970-05-27 einschließlich Zusatzerhebung), 2011-05-09:"
+    " Zensus, sonst Fortschreibung auf Basis der vorherigen Volkszählung (1971"
+    " bis 1986 durch Rückschreibung der Volkszählung 1987, ab 2011-12-31"
+    " Fortschreibung auf Grundlage des Zensus 2011).",
+    "",
+    "2) Ausländer der Stadt Bremen 1979 - 1998 (ohne 1987-05-25) aus dem"
+    " Einwohnermelderegister.\nAusländer der Stadt Bremerhaven 1979 - 1998"
+    " (ohne 1987-05-25) aus dem Ausländerzentralregister.",
+    "",
+    "",
+    "© Statistisches Landesamt Bremen ",
+]
+
+# size of the real data at scale 1
+ORTSTEILE = 87
+ORTSTEILE_PER_STADTTEIL = 4.6
+STADTTEILE_PER_STADTBEZIRK = 3.8
+ORTSTEIL_AREA = 3.7e6  # m²
+POPULATION = 6_500  # per Ortsteil
+BREMERHAVEN = 115_000
+LAST_YEAR = 2023
+
+# south west corner of the synthetic city, ETRS89 / UTM 32N
+ORIGIN = (470_000.0, 5_870_000.0)
+CRS = "EPSG:25832"
+
+STEMS = [
+    "Altstadt", "Neustadt", "Hafen", "Mühlen", "Grün", "Heide", "Wisch",
+    "Fähr", "Höhen", "Weide", "Marsch", "Brück", "Deich", "Wall", "Moor",
+]  # fmt: skip
+
+# share of the Ortsteile that are suppressed completely
+SUPPRESSED = 0.02
+
+
+def _names(count: int, rng: np.random.Generator, offset: int) -> list[str]:
+    stems = rng.permutation(STEMS)
+    return [f"{stems[(i + offset) % len(stems)]} {i + 1}" for i in range(count)]
+
+
+def _width(age_group: str) -> int:
+    bounds = [int(number) for number in re.findall(r"\d+", age_group)]
+    if age_group.startswith("unter"):
+        return bounds[0]
+    if len(bounds) == 2:
+        return bounds[1] - bounds[0]
+    return 10
+
+
+def _age_profile(age_groups: list[str]) -> np.ndarray:
+    """Expected share of each age group, by width and a survival curve."""
+    widths = np.array([_width(group) for group in age_groups], dtype=float)
+    middles = np.cumsum(widths) - widths / 2
+    weights = widths * np.exp(-((middles / 82) ** 6))
+    return weights / weights.sum()
+
+
+def territories(
+    ortsteile: int = ORTSTEILE, seed: int = 0
+) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame, gpd.GeoDataFrame]:
+    """Ortsteil, Stadtteil and Stadtbezirk layers of a synthetic city."""
+    rng = np.random.default_rng(seed)
+    stadtteile = max(1, round(ortsteile / ORTSTEILE_PER_STADTTEIL))
+    stadtbezirke = max(1, round(stadtteile / STADTTEILE_PER_STADTBEZIRK))
+
+    side = np.sqrt(ortsteile * ORTSTEIL_AREA)
+    x0, y0 = ORIGIN
+    extent = shapely.box(x0, y0, x0 + side, y0 + side)
+    points = shapely.points(rng.uniform((x0, y0), (x0 + side, y0 + side), (ortsteile, 2)))
+    cells = shapely.intersection(
+        shapely.get_parts(
+            shapely.voronoi_polygons(
+                shapely.multipoints(points), extend_to=extent, ordered=True
+            )
+        ),
+        extent,
+    )
+
+    # seeds of the upper levels are Ortsteile, every Ortsteil joins the
+    # nearest seed, so no Stadtteil or Stadtbezirk ends up empty
+    st_seeds = np.sort(rng.choice(ortsteile, stadtteile, replace=False))
+    st_of_ot = shapely.STRtree(points[st_seeds]).query_nearest(points, all_matches=False)[1]
+    sb_seeds = np.sort(rng.choice(stadtteile, stadtbezirke, replace=False))
+    sb_of_st = shapely.STRtree(points[st_seeds][sb_seeds]).query_nearest(
+        points[st_seeds], all_matches=False
+    )[1]
+
+    # keys follow the real scheme (04011 + Stadtbezirk + Stadtteil +
+    # Ortsteil digit), with wider fields where a level has more than nine
+    sb_names = _names(stadtbezirke, rng, 0)
+    st_names = _names(stadtteile, rng, 5)
+    ot_names = _names(ortsteile, rng, 10)
+
+    def width(count):
+        return len(str(count))
+
+    st_in_sb = pd.Series(np.arange(stadtteile)).groupby(sb_of_st).cumcount() + 1
+    ot_in_st = pd.Series(np.arange(ortsteile)).groupby(st_of_ot).cumcount() + 1
+    sch_sb = [f"04011{i + 1:0{width(stadtbezirke)}d}" for i in range(stadtbezirke)]
+    sch_st = [
+        f"{sch_sb[sb_of_st[i]]}{st_in_sb[i]:0{width(st_in_sb.max())}d}"
+        for i in range(stadtteile)
+    ]
+    sch_ot = [
+        f"{sch_st[st_of_ot[i]]}{ot_in_st[i]:0{width(ot_in_st.max())}d}"
+        for i in range(ortsteile)
+    ]
+
+    common = {"bez_lan": "Bremen", "bez_krs": "Bremen"}
+    ot = gpd.GeoDataFrame(
+        {
+            "id": np.arange(1, ortsteile + 1),
+            "objectid": np.arange(1, ortsteile + 1, dtype=float),
+            "target_fid": np.arange(ortsteile, dtype=float),
+            "land": "NI",
+            "modellart": "Basis-DLM",
+            "objart": "75003",
+            "objid": [f"DESYNT{i:010d}" for i in range(ortsteile)],
+            "bez_krs": "Bremen",
+            "bez_lan": "Bremen",
+            "bez_rbz": "Bremen",
+            "bez_ot": ot_names,
+            "sch_ot": sch_ot,
+            "size": shapely.area(cells) / 1e6,
+            "sch": [sch_st[i] for i in st_of_ot],
+            "bez_st": [st_names[i] for i in st_of_ot],
+            "sch_st": [sch_st[i] for i in st_of_ot],
+            "bez_sb": [sb_names[sb_of_st[i]] for i in st_of_ot],
+            "sch_sb": [sch_sb[sb_of_st[i]] for i in st_of_ot],
+            "bezirk": [str(sb_of_st[i] + 1) for i in st_of_ot],
+        },
+        geometry=cells,
+        crs=CRS,
+    )
+
+    st = ot.dissolve("sch_st", as_index=False, sort=True)
+    st = st.assign(id=np.arange(1, len(st) + 1), size=st.area / 1e6, sch=st["sch_st"])[
+        ["id", *common, "bez_st", "sch", "size", "bez_sb", "sch_sb", "bezirk", "geometry"]
+    ]
+
+    sb = ot.dissolve("sch_sb", as_index=False, sort=True)
+    sb = sb.assign(
+        id=np.arange(1, len(sb) + 1),
+        repentuncd=None,
+        unaggid=None,
+        agglomerat=None,
+        inhabitant=np.nan,
+        size=sb.area / 1e6,
+        bezirk_nr=sb["bezirk"].astype(float),
+    )[
+        ["id", *common, "bez_sb", "sch_sb", "repentuncd", "unaggid", "agglomerat"]
+        + ["inhabitant", "size", "bezirk_nr", "geometry"]
+    ]
+
+    return ot.sort_values("sch_ot", ignore_index=True), st, sb
+
+
+def counts(
+    population: np.ndarray, profile: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """(territory, age group, count column) array of consistent counts."""
+    n = len(population)
+    ages = rng.dirichlet(profile * 300, n)
+    foreign = rng.beta(2, 8, n)
+    male = rng.normal(0.49, 0.015, n).clip(0.4, 0.6)
+    # german male, german female, foreigner male, foreigner female
+    nationality_sex = np.stack(
+        [(1 - foreign) * male, (1 - foreign) * (1 - male), foreign * male, foreign * (1 - male)],
+        axis=1,
+    )
+    pvals = (ages[:, :, None] * nationality_sex[:, None, :]).reshape(n, -1)
+    gm, gf, fm, ff = np.moveaxis(
+        rng.multinomial(population, pvals).reshape(n, len(profile), 4), 2, 0
+    )
+    # same order as COUNT_COLUMNS
+    return np.stack(
+        [gm + gf + fm + ff, gm + fm, gf + ff, gm + gf, gm, gf, fm + ff, fm, ff], axis=2
+    )
+
+
+def write_year(
+    target: Path,
+    year: int,
+    ot: gpd.GeoDataFrame,
+    age_groups: list[str],
+    seed: int = 0,
+) -> Path:
+    rng = np.random.default_rng([seed, year])
+    size = rng.lognormal(np.log(POPULATION), 0.6, len(ot)).astype(np.int64)
+    growth = (1 + rng.normal(0.002, 0.01, len(ot))) ** (year - LAST_YEAR)
+    population = (size * growth).astype(np.int64)
+
+    profile = _age_profile(age_groups)
+    ot_counts = counts(population, profile, rng)
+    bremerhaven = counts(np.array([BREMERHAVEN]), profile, rng)
+
+    def grouped(key):
+        return pd.DataFrame(ot_counts.reshape(len(ot), -1)).groupby(ot[key].to_numpy()).sum()
+
+    st_counts = grouped("sch_st")
+    sb_counts = grouped("sch_sb")
+    stadt = ot_counts.sum(axis=0, keepdims=True)
+
+    # territories in file order: Land, Stadt Bremen, then every Stadtbezirk
+    # followed by its Stadtteile, each followed by its Ortsteile, Bremerhaven
+    blocks = [("04", "Land Bremen", stadt + bremerhaven), ("04011", "Stadt Bremen", stadt)]
+    st_names = ot.drop_duplicates("sch_st").set_index("sch_st")["bez_st"]
+    sb_names = ot.drop_duplicates("sch_sb").set_index("sch_sb")["bez_sb"]
+    suppressed = rng.random(len(ot)) < SUPPRESSED
+    for sb_key, sb_rows in ot.groupby("sch_sb", sort=True):
+        blocks.append((sb_key, f"{sb_names[sb_key]} (Stadtbezirk)", sb_counts.loc[[sb_key]].to_numpy()))
+        for st_key, st_rows in sb_rows.groupby("sch_st", sort=True):
+            blocks.append((st_key, f"{st_names[st_key]} (Stadtteil)", st_counts.loc[[st_key]].to_numpy()))
+            for i in st_rows.index:
+                blocks.append(
+                    (ot.at[i, "sch_ot"], f"{ot.at[i, 'bez_ot']} (Ortsteil)", ot_counts[[i]], suppressed[i])
+                )
+    blocks.append(("04012", "Stadt Bremerhaven", bremerhaven))
+
+    groups = len(age_groups)
+    keys, units, values, hidden = [], [], [], []
+    for key, unit, block, *flags in blocks:
+        block = np.asarray(block).reshape(groups, len(COUNT_COLUMNS))
+        keys += [key] * (groups + 1)
+        units += [unit] * (groups + 1)
+        values.append(np.vstack([block, block.sum(axis=0)]))
+        hidden += [bool(flags and flags[0])] * (groups + 1)
+
+    frame = pd.DataFrame(np.vstack(values), columns=COUNT_COLUMNS).astype(object)
+    frame.loc[np.array(hidden), :] = "x"
+    frame.insert(0, "age_group", (list(age_groups) + ["Insgesamt"]) * len(blocks))
+    frame.insert(0, "date", f"{year}-12-31")
+    frame.insert(0, "territorial_unit", units)
+    frame.insert(0, "territory_key", keys)
+
+    path = Path(target) / f"{TABLE}-{year}.csv"
+    with open(path, "w", encoding="ISO-8859-1", newline="") as f:
+        f.write("\r\n".join(HEADER) + "\r\n")
+        frame.to_csv(f, sep=";", header=False, index=False, lineterminator="\r\n")
+        f.write("\r\n".join(FOOTER))
+    return path
+
+
+def generate(
+    out,
+    ortsteile: int = ORTSTEILE,
+    years=range(LAST_YEAR - 7, LAST_YEAR + 1),
+    age_groups: list[str] = AGE_GROUPS[:-1],
+    seed: int = 0,
+) -> Path:
+    """Write raw files for ``years`` and the matching boundary layers to ``out``."""
+    out = Path(out)
+    raw_dir = out / "raw"
+    boundary_dir = out / "Verwaltungsgrenzen_HB_BHV"
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    boundary_dir.mkdir(parents=True, exist_ok=True)
+
+    ot, st, sb = territories(ortsteile, seed)
+    for name, layer in [("ortsteile", ot), ("stadtteile", st), ("stadtbezirke", sb)]:
+        layer.to_file(boundary_dir / f"hb_{name}_BRE.shp", engine="pyogrio")
+
+    for year in years:
+        write_year(raw_dir, year, ot, list(age_groups), seed)
+
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out", type=Path)
+    parser.add_argument("--scale", type=float, default=1, help="x the real Ortsteile")
+    parser.add_argument("--ortsteile", type=int, help="overrides --scale")
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument(
+        "--age-groups",
+        type=int,
+        default=len(AGE_GROUPS) - 1,
+        help="first N age groups of the real table",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate(
+        args.out,
+        ortsteile=args.ortsteile or round(ORTSTEILE * args.scale),
+        years=range(LAST_YEAR - args.years + 1, LAST_YEAR + 1),
+        age_groups=AGE_GROUPS[: args.age_groups],
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Simplified, quantized TopoJSON versions of the boundary layers.
+
+Every layer is simplified at each of ``TOLERANCES`` with
+``shapely.coverage_simplify``, which moves shared edges of neighbouring
+polygons together. That only holds for a valid coverage, and some source
+layers are not one: the Stadtteile of Bremen and Bremerhaven have edges
+that almost but not exactly match their neighbours', and simplifying them
+as they are opens holes and overlaps of several thousand m². So the
+polygons are first snapped into a clean coverage with
+``shapely.coverage_clean``, which moves vertices by micrometres, and the
+simplified result is checked with ``shapely.coverage_is_valid``.
+
+The result is encoded as TopoJSON: each shared edge is stored once as an
+arc, coordinates are quantized to a ``QUANTIZATION`` x ``QUANTIZATION`` grid
+and delta-encoded. The map picks the coarsest level that is still finer
+than half a pixel at its render size.
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pandas as pd
+import shapely
+
+from . import BOUNDARY_DIR, CACHE_DIR
+from .files import supersede, write_text
+from .geometry import (
+    LEVELS,
+    boundaries_manifest,
+    convert,
+    layer_bounds,
+    layers,
+    load_layer,
+)
+from .profiling import profiled
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+# metres, the layers are in ETRS89 / UTM 32N
+TOLERANCES = (5.0, 15.0, 30.0, 60.0)
+QUANTIZATION = 10_000
+# bump when the encoded output changes, invalidates cached topologies
+TOPOLOGY_VERSION = 2
+
+_memo = {}
+
+
+def simplify(gdf: "gpd.GeoDataFrame", tolerance: float) -> "gpd.GeoDataFrame":
+    """Clean the coverage of ``gdf``, then simplify its shared edges together."""
+    geometry = shapely.coverage_simplify(
+        shapely.coverage_clean(gdf.geometry.values), tolerance
+    )
+    if not shapely.coverage_is_valid(geometry):
+        raise ValueError(f"simplifying at {tolerance:g} m left an invalid coverage")
+    return gdf.set_geometry(geometry, crs=gdf.crs)
+
+
+def _rings(geometry) -> list[list[list]]:
+    polygons = getattr(geometry, "geoms", [geometry])
+    return [
+        [list(polygon.exterior.coords)] + [list(ring.coords) for ring in polygon.interiors]
+        for polygon in polygons
+    ]
+
+
+def _segment(a, b):
+    return (a, b) if a <= b else (b, a)
+
+
+def to_topojson(
+    gdf: "gpd.GeoDataFrame", name: str, quantization: int = QUANTIZATION
+) -> dict:
+    x0, y0, x1, y1 = gdf.total_bounds
+    kx = (x1 - x0) / (quantization - 1) or 1.0
+    ky = (y1 - y0) / (quantization - 1) or 1.0
+
+    def quantize(ring):
+        points = []
+        for x, y in ring:
+            point = (round((x - x0) / kx), round((y - y0) / ky))
+            if not points or point != points[-1]:
+                points.append(point)
+        return points
+
+    # geometry -> polygon -> ring, every ring closed (first == last point)
+    shapes = [
+        [[quantize(ring) for ring in polygon] for polygon in _rings(geometry)]
+        for geometry in gdf.geometry
+    ]
+    rings = [ring for shape in shapes for polygon in shape for ring in polygon]
+
+    owners = defaultdict(set)
+    for ring_id, ring in enumerate(rings):
+        for a, b in zip(ring, ring[1:]):
+            owners[_segment(a, b)].add(ring_id)
+
+    # an arc ends wherever the set of rings sharing the boundary changes
+    junctions = set()
+    for ring in rings:
+        points = ring[:-1]
+        for i, point in enumerate(points):
+            before = owners[_segment(points[i - 1], point)]
+            after = owners[_segment(point, points[(i + 1) % len(points)])]
+            if before != after:
+                junctions.add(point)
+
+    arcs = []
+    arc_ids = {}
+
+    def arc_index(points):
+        key = tuple(points)
+        if key in arc_ids:
+            return arc_ids[key]
+        if key[::-1] in arc_ids:
+            return ~arc_ids[key[::-1]]
+        arc_ids[key] = len(arcs)
+        arcs.append(points)
+        return arc_ids[key]
+
+    def ring_arcs(ring):
+        points = ring[:-1]
+        cuts = [i for i, point in enumerate(points) if point in junctions]
+        if not cuts:
+            # free-standing ring: start at its smallest point so that a ring
+            # shared completely with another polygon is found again
+            start = points.index(min(points))
+            return [arc_index(points[start:] + points[: start + 1])]
+
+        rotated = points[cuts[0] :] + points[: cuts[0] + 1]
+        result, current = [], [rotated[0]]
+        for point in rotated[1:]:
+            current.append(point)
+            if point in junctions:
+                result.append(arc_index(current))
+                current = [point]
+        return result
+
+    geometries = []
+    properties = json.loads(gdf.drop(columns=gdf.geometry.name).to_json(orient="records"))
+    for shape, props in zip(shapes, properties):
+        polygons = [[ring_arcs(ring) for ring in polygon] for polygon in shape]
+        if len(polygons) == 1:
+            geometry = {"type": "Polygon", "arcs": polygons[0]}
+        else:
+            geometry = {"type": "MultiPolygon", "arcs": polygons}
+        geometries.append({**geometry, "properties": props})
+
+    encoded = []
+    for points in arcs:
+        deltas = [list(points[0])]
+        for (ax, ay), (bx, by) in zip(points, points[1:]):
+            deltas.append([bx - ax, by - ay])
+        encoded.append(deltas)
+
+    return {
+        "type": "Topology",
+        "bbox": [x0, y0, x1, y1],
+        "transform": {"scale": [kx, ky], "translate": [x0, y0]},
+        "objects": {name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded,
+    }
+
+
+def decode(topology: dict) -> list:
+    """Shapely geometries of the first object of a TopoJSON topology."""
+    (kx, ky), (x0, y0) = topology["transform"]["scale"], topology["transform"]["translate"]
+    arcs = []
+    for deltas in topology["arcs"]:
+        x, y, points = 0, 0, []
+        for dx, dy in deltas:
+            x, y = x + dx, y + dy
+            points.append((x0 + x * kx, y0 + y * ky))
+        arcs.append(points)
+
+    def ring(indices):
+        points = []
+        for index in indices:
+            arc = arcs[index] if index >= 0 else arcs[~index][::-1]
+            points.extend(arc if not points else arc[1:])
+        return points
+
+    def polygon(rings):
+        return shapely.Polygon(ring(rings[0]), [ring(r) for r in rings[1:]])
+
+    layer = next(iter(topology["objects"].values()))
+    return [
+        polygon(geometry["arcs"])
+        if geometry["type"] == "Polygon"
+        else shapely.MultiPolygon([polygon(rings) for rings in geometry["arcs"]])
+        for geometry in layer["geometries"]
+    ]
+
+
+def pick_tolerance(bounds, width: int, height: int) -> float:
+    """Coarsest tolerance below half a pixel of a ``width`` x ``height`` map."""
+    x0, y0, x1, y1 = bounds
+    half_pixel = max((x1 - x0) / width, (y1 - y0) / height) / 2
+    fitting = [tolerance for tolerance in TOLERANCES if tolerance <= half_pixel]
+    return max(fitting, default=min(TOLERANCES))
+
+
+def build(
+    layer: str, tolerance: float, boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR
+) -> Path:
+    """Write the TopoJSON of ``layer`` at ``tolerance`` unless it is cached."""
+    source = convert(layer, boundary_dir, cache_dir)
+    target = source.with_name(
+        f"{source.stem}-v{TOPOLOGY_VERSION}-t{tolerance:g}.topojson"
+    )
+
+    if not target.exists():
+        gdf = simplify(load_layer(layer, boundary_dir, cache_dir), tolerance)
+        write_text(target, json.dumps(to_topojson(gdf, layer), separators=(",", ":")))
+        key = f"{layer}-t{tolerance:g}.topojson"
+        supersede(boundaries_manifest(cache_dir), key, target)
+
+    return target
+
+
+def build_all(boundary_dir=BOUNDARY_DIR, cache_dir=CACHE_DIR) -> list[Path]:
+    """Build every level of detail of every polygon layer."""
+    return [
+        build(layer, tolerance, boundary_dir, cache_dir)
+        for layer in layers(boundary_dir)
+        if load_layer(layer, boundary_dir, cache_dir)
+        .geom_type.isin(["Polygon", "MultiPolygon"])
+        .all()
+        for tolerance in TOLERANCES
+    ]
+
+
+@profiled("topology.load_topojson")
+def load_topojson(
+    level: str, width: int, height: int, city: str = "BRE", **kwargs
+) -> dict:
+    """TopoJSON of a dashboard level at the detail fitting the render size."""
+    layer = f"{LEVELS[level]}_{city}"
+    bounds = layer_bounds(layer, **kwargs)
+    path = build(layer, pick_tolerance(bounds, width, height), **kwargs)
+
+    if path not in _memo:
+        _memo[path] = json.loads(path.read_text())
+    return _memo[path]
+
+
+@profiled("topology.with_properties")
+def with_properties(topology: dict, table: pd.DataFrame, key: str) -> dict:
+    """Copy of ``topology`` with the columns of ``table`` joined into the
+    properties of its geometries on ``key``. The arcs are shared, not copied.
+    """
+    name = next(iter(topology["objects"]))
+    rows = json.loads(table.set_index(key).to_json(orient="index"))
+
+    layer = topology["objects"][name]
+    geometries = [
+        {
+            **geometry,
+            "properties": {
+                **geometry["properties"],
+                **rows.get(geometry["properties"][key], {}),
+            },
+        }
+        for geometry in layer["geometries"]
+    ]
+    return {**topology, "objects": {name: {**layer, "geometries": geometries}}}
@@ -0,0 +1,59 @@
+"""Development of every territory across all years of the catalog.
+
+Built from the per-year summary tables in one grouped pass: the rows are
+sorted by territory and year, and every measure is compared with the
+previous row of the same territory. The years of the raw data are not
+consecutive (1980, 1990, ..., 2020, 2021, ...), so a change is always
+relative to the previous year *available*, named in ``previous_year``.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+# trend column -> title in the dashboard
+TREND_MEASURES = {
+    "population_total": "Total population",
+    "foreigner_total": "Foreign population",
+    "percentage_foreigner": "Percentage of foreigners",
+    "median_population_total": "Median age group",
+}
+
+
+@profiled("trend.trends")
+def trends(summary: pd.DataFrame, measures=tuple(TREND_MEASURES)) -> pd.DataFrame:
+    """Measures of every territory and year with their year-over-year change.
+
+    ``summary`` is indexed by (year, territorial_unit) like
+    :meth:`bremen.catalog.Catalog.load_summary`. Every measure gets a
+    ``<measure>_change``, counts and shares also a relative
+    ``<measure>_change_pct`` in percent; a median age group changes by the
+    number of age groups it moved. The first year of a territory has NaN.
+    """
+    table = summary[list(measures)].reset_index()
+    table = table.sort_values(["territorial_unit", "year"], kind="stable", ignore_index=True)
+
+    # medians are compared by their position in the ordered categories
+    ordinal = [m for m in measures if isinstance(table[m].dtype, pd.CategoricalDtype)]
+    values = table[list(measures)].assign(
+        **{m: table[m].cat.codes.replace(-1, np.nan) for m in ordinal}
+    ).astype("float64")
+
+    previous = table[["year"]].join(values).groupby(
+        table["territorial_unit"], sort=False, observed=True
+    ).shift()
+    change = values - previous[list(measures)]
+    numeric = [m for m in measures if m not in ordinal]
+    change_pct = 100 * change[numeric] / previous[numeric].where(previous[numeric] != 0)
+
+    return pd.concat(
+        [
+            table[["territorial_unit", "year"]],
+            previous["year"].rename("previous_year"),
+            table[list(measures)],
+            change.add_suffix("_change"),
+            change_pct.add_suffix("_change_pct"),
+        ],
+        axis=1,
+    ).set_index(["territorial_unit", "year"])
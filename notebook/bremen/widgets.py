@@ -0,0 +1,79 @@
+"""marimo building blocks of the dashboard layout.
+
+Shared by the notebook and the startup snapshot (:mod:`bremen.snapshot`),
+which lays out stored values and chart specs the same way before pandas is
+imported. A selection is anything indexable by the summary
+columns: a row of the summary table or its stored dict.
+"""
+
+import functools
+
+import marimo as mo
+
+# series prefix -> stat label
+GROUPS = {"population": "Total population", "german": "German", "foreigner": "Foreigner"}
+
+GENDERS = {"total": "", "female": " (female)", "male": " (male)"}
+
+
+def share(selection, group: str, gender: str) -> float:
+    """Percentage shown under a count of the stats grid, NaN without counts."""
+    suffix = "" if gender == "total" else f"_{gender}"
+    if group == "population":
+        return selection[f"percentage_foreigner{suffix}"] + selection[
+            f"percentage_german{suffix}"
+        ]
+    return selection[f"percentage_{group}{suffix}"]
+
+
+def stats_grid(selection) -> mo.Html:
+    """Counts of a selection with their shares, one column per group."""
+    columns = [
+        mo.vstack(
+            [
+                mo.stat(
+                    value=f"{selection[f'{group}_{gender}']}",
+                    label=f"{label}{suffix}",
+                    caption=f"{share(selection, group, gender):.1f} %",
+                    bordered=True,
+                )
+                for gender, suffix in GENDERS.items()
+            ]
+        )
+        for group, label in GROUPS.items()
+    ]
+    return mo.hstack(columns, align="start", justify="start")
+
+
+@functools.cache
+def _spec_chart() -> type:
+    # Altair is only imported with the first chart
+    import altair as alt
+
+    class SpecChart(alt.TopLevelMixin):
+        """A finished spec where marimo expects an Altair chart. Unlike
+        ``alt.Chart.from_dict`` it is not parsed and validated again."""
+
+        data = alt.Undefined
+
+        def __init__(self, spec: dict):
+            self.spec = spec
+            self._kwds = {}
+
+        def to_dict(self, *args, **kwargs) -> dict:
+            return dict(self.spec)
+
+    return SpecChart
+
+
+def chart(spec: dict) -> mo.Html:
+    """A Vega-Lite ``spec`` drawn by the Vega bundled with marimo, so charts
+    need no CDN and survive ``marimo export html``."""
+    return mo.ui.altair_chart(
+        _spec_chart()(spec), chart_selection=False, legend_selection=False
+    )
+
+
+def dashboard(stats: mo.Html, map: mo.Html, tabs: mo.Html, *below) -> mo.Html:
+    """Stats next to the map, the pyramid tabs and ``below`` underneath."""
+    return mo.vstack([mo.hstack([mo.center(stats), map]), tabs, *below], gap=3.0)
@@ -0,0 +1 @@
+"""Lets ``pytest`` import the ``bremen`` package from any working directory."""
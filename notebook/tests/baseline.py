@@ -0,0 +1,50 @@
+"""The original notebook code the tests compare against."""
+
+import pandas as pd
+
+from bremen import RAW_DIR, TABLE
+from bremen.schema import COUNT_COLUMNS
+
+RAW_FILES = sorted(RAW_DIR.glob(f"{TABLE}-*.csv"))
+
+# how the notebook read a raw file before the catalog
+BASELINE_COLUMNS = {
+    "Unnamed: 0": "territory_key",
+    "Unnamed: 1": "territorial_unit",
+    "Unnamed: 2": "date",
+    "Unnamed: 3": "age_group",
+    "Unnamed: 4": "population_total",
+    "Unnamed: 5": "population_male",
+    "Unnamed: 6": "population_female",
+    "zusammen": "german_total",
+    "männlich": "german_male",
+    "weiblich": "german_female",
+    "zusammen.1": "foreigner_total",
+    "männlich.1": "foreigner_male",
+    "weiblich.1": "foreigner_female",
+}
+
+
+def read_baseline(path) -> pd.DataFrame:
+    return (
+        pd.read_csv(
+            path,
+            encoding="ISO-8859-1",
+            sep=";",
+            skiprows=3,
+            skipfooter=9,
+            engine="python",
+        )
+        .rename(columns=BASELINE_COLUMNS)
+        .replace("x", "0")
+        .astype({column: int for column in COUNT_COLUMNS})
+    )
+
+
+def determine_median(population: pd.Series, agegroups: pd.Series):
+    """The notebook's median age group of one selection."""
+    cumul_population = population.cumsum()
+    half_value = cumul_population.iloc[-1] / 2
+
+    index = (cumul_population - half_value).gt(0).idxmax()
+    return agegroups.loc[index]
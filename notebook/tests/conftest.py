@@ -0,0 +1,22 @@
+"""Fixtures shared by the tests: the raw files read the way the original
+notebook read them, and a catalog ingested into a temporary cache."""
+
+import pandas as pd
+import pytest
+
+from bremen.catalog import Catalog
+
+from baseline import RAW_FILES, read_baseline
+
+
+@pytest.fixture(scope="session")
+def baseline_years() -> dict[str, pd.DataFrame]:
+    """Raw file of every year as the notebook read it, by year."""
+    return {path.stem.rsplit("-", 1)[1]: read_baseline(path) for path in RAW_FILES}
+
+
+@pytest.fixture(scope="session")
+def catalog(tmp_path_factory) -> Catalog:
+    catalog = Catalog(cache_dir=tmp_path_factory.mktemp("cache"))
+    catalog.refresh(max_workers=1)
+    return catalog
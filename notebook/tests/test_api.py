@@ -0,0 +1,88 @@
+from email.utils import formatdate
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from starlette.testclient import TestClient
+
+from bremen.api import ARROW, Aggregates, create_app
+
+
+@pytest.fixture(scope="module")
+def client(catalog):
+    with TestClient(create_app(Aggregates(catalog))) as client:
+        yield client
+
+
+def test_years(client, catalog):
+    response = client.get("/years")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["vary"] == "Accept"
+    assert [row["year"] for row in response.json()] == sorted(catalog.years)
+
+
+def test_summary_of_a_level(client, catalog):
+    response = client.get("/2023/summary", params={"level": "Stadtteil"})
+    assert response.status_code == 200
+    summary = catalog.load_summary().loc["2023"]
+    assert len(response.json()) == summary.index.str.endswith("(Stadtteil)").sum()
+
+
+def test_ages_as_arrow(client):
+    response = client.get("/2023/ages/Mitte (Stadtteil)", params={"format": "arrow"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW
+
+    table = pa.ipc.open_stream(response.content).read_all().to_pandas()
+    records = pd.DataFrame(client.get("/2023/ages/Mitte (Stadtteil)").json())
+    assert len(table) == len(records) == 21
+    assert table["population_total"].tolist() == records["population_total"].tolist()
+    assert client.get(
+        "/2023/ages/Mitte (Stadtteil)", headers={"accept": ARROW}
+    ).headers["content-type"] == ARROW
+
+
+@pytest.mark.parametrize(
+    "path, params, status",
+    [
+        ("/1999/summary", {}, 404),
+        ("/2023/summary/Nowhere", {}, 404),
+        ("/2023/ages/Nowhere", {}, 404),
+        ("/2023/territories", {"level": "Kreis"}, 400),
+        ("/2023/summary", {"format": "xml"}, 400),
+        ("/2023/territories", {"level": "Ortsteil"}, 200),
+        ("/2023/summary/Stadt Bremen", {}, 200),
+    ],
+)
+def test_status_codes(client, path, params, status):
+    assert client.get(path, params=params).status_code == status
+
+
+def test_etags(client):
+    first = client.get("/2023/summary")
+    etag = first.headers["etag"]
+    assert client.get("/2023/summary").headers["etag"] == etag
+    assert client.get("/2022/summary").headers["etag"] != etag
+    assert client.get("/2023/summary", params={"format": "arrow"}).headers["etag"] != etag
+
+    for if_none_match in [etag, f"W/{etag}", f'"other", {etag}', "*"]:
+        response = client.get("/2023/summary", headers={"if-none-match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    assert client.get(
+        "/2023/summary", headers={"if-none-match": '"other"'}
+    ).status_code == 200
+
+
+def test_last_modified(client):
+    last_modified = client.get("/2023/summary").headers["last-modified"]
+    for since, status in [
+        (last_modified, 304),
+        (formatdate(0, usegmt=True), 200),
+        ("not a date", 200),
+    ]:
+        response = client.get("/2023/summary", headers={"if-modified-since": since})
+        assert response.status_code == status
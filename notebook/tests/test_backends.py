@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bremen.backends import PandasBackend, open_backend
+from bremen.schema import COUNT_COLUMNS
+from bremen.summary import UNIT_COLUMNS
+
+SELECTIONS = [
+    "Stadt Bremen",
+    "Mitte (Stadtteil)",
+    "Blumenthal (Ortsteil)",
+    "Nord (Stadtbezirk)",
+]
+
+
+def assert_same(actual: pd.DataFrame, expected: pd.DataFrame):
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+@pytest.fixture(scope="module")
+def pandas_backend(catalog):
+    return PandasBackend(catalog)
+
+
+def test_rows_match_the_notebook(pandas_backend, baseline_years):
+    for year, df in baseline_years.items():
+        df = df[df["age_group"] != "Insgesamt"]
+        for unit in SELECTIONS:
+            rows = pandas_backend.rows(year, unit)
+            expected = df[df["territorial_unit"] == unit]
+
+            assert len(rows) == 21
+            assert rows["age_group"].astype(str).tolist() == list(expected["age_group"])
+            for column in COUNT_COLUMNS:
+                share = 100 / expected[column].sum() * expected[column]
+                np.testing.assert_allclose(rows[f"percentage_{column}"], share)
+
+
+@pytest.mark.parametrize("name", ["duckdb", "polars"])
+def test_backends_agree_with_pandas(name, catalog, pandas_backend):
+    pytest.importorskip(name)
+    backend = open_backend(catalog, name)
+
+    assert_same(backend.summary().reset_index(), pandas_backend.summary().reset_index())
+    for year in catalog.years:
+        assert backend.territories(year) == pandas_backend.territories(year)
+        for level in UNIT_COLUMNS:
+            assert_same(
+                backend.map_table(year, level), pandas_backend.map_table(year, level)
+            )
+        for unit in SELECTIONS:
+            assert_same(backend.rows(year, unit), pandas_backend.rows(year, unit))
+            pd.testing.assert_series_equal(
+                backend.summary_row(year, unit),
+                pandas_backend.summary_row(year, unit),
+                check_dtype=False,
+            )
+
+
+def test_unknown_backend(catalog):
+    with pytest.raises(ValueError, match="unknown backend"):
+        open_backend(catalog, "sqlite")
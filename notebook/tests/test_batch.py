@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from bremen import batch
+from bremen.catalog import Catalog
+
+UNITS = ["Stadt Bremen", "Mitte (Stadtteil)"]
+
+
+@pytest.fixture
+def batch_run(tmp_path, catalog, monkeypatch):
+    """batch.run on one year and two territories, writing into a temporary
+    directory; the workers are forked and inherit the patches."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    source = catalog.files["2023"]
+    (raw_dir / source.name).write_bytes(source.read_bytes())
+
+    monkeypatch.setattr(batch, "Catalog", lambda: Catalog(raw_dir, tmp_path / "cache"))
+    monkeypatch.setattr(batch, "territories", lambda index, year: UNITS)
+    monkeypatch.setattr(batch, "vl_convert", None)
+    monkeypatch.setattr(batch, "_state", {})
+
+    out = tmp_path / "out"
+    return lambda: batch.run(out, workers=1), out
+
+
+def test_rerun_only_renders_what_is_missing(batch_run):
+    run, out = batch_run
+    jobs = len(UNITS) + len(batch.LEVELS)
+    assert run() == {"jobs": jobs, "rendered": jobs, "skipped": 0}
+    assert run() == {"jobs": jobs, "rendered": 0, "skipped": jobs}
+
+    # a run stopped while rendering Mitte and the Ortsteil map
+    territory = out / "2023" / "mitte-stadtteil"
+    (territory / "inputs.json").unlink()
+    (territory / "pyramids-foreigner.html").unlink()
+    (out / "2023" / "map-ortsteil.inputs.json").unlink()
+
+    assert run() == {"jobs": jobs, "rendered": 2, "skipped": jobs - 2}
+    assert (territory / "pyramids-foreigner.html").exists()
+
+
+def test_new_render_version_renders_everything(batch_run, monkeypatch):
+    run, _ = batch_run
+    run()
+    monkeypatch.setattr(batch, "RENDER_VERSION", batch.RENDER_VERSION + 1)
+    assert run()["skipped"] == 0
+
+
+def test_territory_without_counts(batch_run):
+    run, out = batch_run
+    run()  # ingests the year into the scratch cache
+    batch.render_territory("2023", "Handelshäfen (Ortsteil)", out, "digest")
+
+    target = out / "2023" / "handelshäfen-ortsteil"
+    stats = json.loads((target / "stats.json").read_text())
+    assert stats["population_total"] == 0 and stats["percentage_foreigner"] is None
+    assert "<td>0<br><small>&ndash;</small></td>" in (target / "stats.html").read_text()
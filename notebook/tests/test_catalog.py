@@ -0,0 +1,67 @@
+"""Incremental refresh of the catalog against a scratch raw directory."""
+
+import os
+import shutil
+
+import pytest
+
+from bremen.catalog import Catalog
+from bremen.ingest import file_digest, partition_dir
+
+from baseline import RAW_FILES
+
+
+@pytest.fixture
+def scratch(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    for path in RAW_FILES[:2]:
+        shutil.copy2(path, raw_dir / path.name)
+    return Catalog(raw_dir, tmp_path / "cache")
+
+
+def test_refresh_only_ingests_new_files(scratch):
+    first, second = sorted(scratch.discover())
+    (scratch.raw_dir / RAW_FILES[1].name).unlink()
+
+    assert scratch.refresh(max_workers=1) == [first]
+    shutil.copy2(RAW_FILES[1], scratch.raw_dir / RAW_FILES[1].name)
+    assert scratch.refresh(max_workers=1) == [second]
+    assert scratch.refresh(max_workers=1) == []
+    assert Catalog(scratch.raw_dir, scratch.cache_dir).refresh(max_workers=1) == []
+
+
+def test_touched_file_is_not_ingested_again(scratch):
+    scratch.refresh(max_workers=1)
+    path = scratch.raw_dir / RAW_FILES[0].name
+    year = path.stem.rsplit("-", 1)[1]
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert scratch.refresh(max_workers=1) == []
+    assert scratch.manifest[year]["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+
+def test_changed_content_is_ingested_again(scratch):
+    scratch.refresh(max_workers=1)
+    path = scratch.raw_dir / RAW_FILES[0].name
+    year = path.stem.rsplit("-", 1)[1]
+    stat = path.stat()
+    # other content under the same mtime
+    path.write_bytes(RAW_FILES[1].read_bytes())
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert scratch.refresh(max_workers=1) == [year]
+    assert scratch.manifest[year]["sha256"] == file_digest(RAW_FILES[1])
+
+
+def test_removed_file_drops_its_partition(scratch):
+    scratch.refresh(max_workers=1)
+    path = scratch.raw_dir / RAW_FILES[0].name
+    year = path.stem.rsplit("-", 1)[1]
+    path.unlink()
+
+    assert scratch.refresh(max_workers=1) == []
+    assert year not in scratch.manifest
+    assert not partition_dir(year, scratch.cache_dir).exists()
+    assert not list(scratch.cache_dir.rglob("*.tmp"))
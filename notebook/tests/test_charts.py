@@ -0,0 +1,109 @@
+import json
+from types import SimpleNamespace
+
+import marimo as mo
+import pytest
+
+from bremen import widgets
+from bremen.backends import PandasBackend
+from bremen.charts import MAP_FEATURES, SERIES, SpecCache, age_pyramids, choropleth
+from bremen.summary import UNIT_COLUMNS
+from bremen.topology import load_topojson, with_properties
+
+
+def built(spec: dict):
+    """A stand-in for a chart, counting how often it is built."""
+    built.count += 1
+    return SimpleNamespace(to_dict=lambda: spec)
+
+
+def spec_of(size: int) -> dict:
+    return {"data": "x" * (size - len(json.dumps({"data": ""})))}
+
+
+def test_spec_cache_counts_hits_and_misses():
+    cache = SpecCache()
+    built.count = 0
+
+    first = cache.get(("2023", "Stadt Bremen"), lambda: built({"mark": "bar"}))
+    again = cache.get(("2023", "Stadt Bremen"), lambda: built({"mark": "area"}))
+
+    assert first == again == {"mark": "bar"} and built.count == 1
+    assert cache.stats() == {
+        "entries": 1,
+        "bytes": len(json.dumps(first)),
+        "hits": 1,
+        "misses": 1,
+    }
+
+
+def test_spec_cache_evicts_the_least_recently_used_specs():
+    cache = SpecCache(max_bytes=250)
+    for key in "aba":
+        cache.get(key, lambda: built(spec_of(100)))
+    cache.get("c", lambda: built(spec_of(100)))
+
+    # a was used again before c came in, so b goes
+    assert cache.stats() == {"entries": 2, "bytes": 200, "hits": 1, "misses": 3}
+    built.count = 0
+    cache.get("a", lambda: built(spec_of(100)))
+    assert built.count == 0
+    cache.get("b", lambda: built(spec_of(100)))
+    assert built.count == 1
+
+
+def test_spec_cache_keeps_a_spec_larger_than_the_limit():
+    cache = SpecCache(max_bytes=50)
+    cache.get("a", lambda: built(spec_of(100)))
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.fixture(scope="module")
+def backend(catalog):
+    return PandasBackend(catalog)
+
+
+def test_chart_of_a_cached_pyramid_spec(backend):
+    cache = SpecCache()
+    rows = backend.rows("2023", "Stadt Bremen")
+    selection = backend.summary_row("2023", "Stadt Bremen")
+    for series in SERIES:
+        spec = cache.get(
+            ("2023", "Stadt Bremen", series, "pyramids"),
+            lambda: age_pyramids(rows, selection, series),
+        )
+        chart = widgets.chart(spec)
+
+        assert isinstance(chart, mo.ui.altair_chart)
+        assert chart._component_args["spec"] == spec
+
+
+@pytest.fixture(scope="module")
+def map_spec(backend):
+    unit = UNIT_COLUMNS["Stadtteil"]
+    table = backend.map_table("2023", "Stadtteil")[[unit] + list(MAP_FEATURES.values())]
+    topology = with_properties(load_topojson("Stadtteil", 600, 400), table, unit)
+    return choropleth(topology, "Stadtteil", unit, width=600, height=400)
+
+
+def test_chart_of_a_cached_map_spec(map_spec):
+    spec = SpecCache().get(("2023", "Stadtteil", "map"), lambda: map_spec)
+    chart = widgets.chart(spec)
+
+    assert isinstance(chart, mo.ui.altair_chart)
+    assert chart._component_args["spec"] == spec
+
+
+@pytest.mark.parametrize("name, field", list(MAP_FEATURES.items())[::3])
+def test_map_title_names_the_selected_feature(name, field, map_spec):
+    vl_convert = pytest.importorskip("vl_convert")
+    spec = map_spec.to_dict()
+    spec["params"][0]["value"] = field
+
+    assert f">Stadtteile: {name}<" in vl_convert.vegalite_to_svg(spec)
+
+
+def test_spec_charts_do_not_share_state():
+    first, second = widgets._spec_chart()({}), widgets._spec_chart()({})
+    first._kwds["title"] = "first"
+    assert second._kwds == {}
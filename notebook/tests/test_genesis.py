@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from bremen.genesis import read_table
+from bremen.schema import COUNT_COLUMNS, DTYPES
+
+from baseline import RAW_FILES, read_baseline
+
+
+@pytest.mark.parametrize("path", RAW_FILES, ids=lambda path: path.stem)
+def test_read_table_matches_pandas(path):
+    expected = read_baseline(path)
+    table = read_table(path)
+
+    assert list(table.columns) == list(expected.columns)
+    assert table.dtypes.to_dict() == DTYPES
+    for column in COUNT_COLUMNS:
+        assert (table[column].to_numpy() == expected[column].to_numpy()).all(), column
+    for column in ["territorial_unit", "age_group"]:
+        assert table[column].astype(str).tolist() == expected[column].tolist()
+    # pandas parsed the keys as numbers, dropping their leading zero
+    assert table["territory_key"].astype(str).str.lstrip("0").tolist() == (
+        expected["territory_key"].astype(str).tolist()
+    )
+    pd.testing.assert_series_equal(
+        table["date"], pd.to_datetime(expected["date"]), check_dtype=False
+    )
+
+
+def test_small_blocks_give_the_same_table():
+    path = RAW_FILES[-1]
+    pd.testing.assert_frame_equal(read_table(path, block_size=4096), read_table(path))
@@ -0,0 +1,32 @@
+import pytest
+
+from bremen.quantiles import GROUPS, AgeDistribution
+from bremen.schema import COUNT_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def summary(catalog):
+    return catalog.load_summary()
+
+
+@pytest.fixture(scope="module")
+def distribution(catalog):
+    return AgeDistribution(catalog.load_panel())
+
+
+def test_quantile_groups_agree_with_the_summary_medians(distribution, summary):
+    medians = distribution.frame(distribution.quantile_groups([0.5])[..., 0])
+
+    assert medians.index.equals(summary.index)
+    for column in COUNT_COLUMNS:
+        groups = [GROUPS[code] for code in medians[column]]
+        assert groups == summary[f"median_{column}"].astype(str).tolist()
+
+
+def test_quantile_ages_are_nan_for_territories_without_counts(distribution, summary):
+    ages = distribution.frame(distribution.quantile_ages([0.5]))
+
+    empty = summary["population_total"] == 0
+    assert empty.any()
+    assert ages.loc[empty[empty].index].isna().all().all()
+    assert ages.loc[empty[~empty].index, "population_total"].notna().all()
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import marimo as mo
+import pytest
+
+from bremen import BOUNDARY_DIR, snapshot
+from bremen.catalog import Catalog
+
+from baseline import RAW_FILES
+
+
+@pytest.fixture
+def stored(tmp_path):
+    """A catalog of one year in a scratch cache and its stored snapshot."""
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    shutil.copy2(RAW_FILES[-1], raw_dir / RAW_FILES[-1].name)
+    boundary_dir = tmp_path / "boundaries"
+    shutil.copytree(BOUNDARY_DIR, boundary_dir)
+
+    catalog = Catalog(raw_dir, tmp_path / "cache")
+    catalog.refresh(max_workers=1)
+    snapshot.build(catalog)
+
+    def load():
+        return snapshot.load(raw_dir, catalog.cache_dir, boundary_dir)
+
+    return catalog, boundary_dir, load
+
+
+def touch(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_stored_view(stored):
+    catalog, _, load = stored
+    view = load()
+
+    assert view["year"] == catalog.years[0] and view["territory"] == "Stadt Bremen"
+    assert isinstance(snapshot.view(view), mo.Html)
+
+
+def test_touched_raw_file_needs_a_refresh_but_no_rebuild(stored):
+    catalog, _, load = stored
+    touch(catalog.files[catalog.years[0]])
+
+    assert load() is None
+    catalog.refresh(max_workers=1)
+    assert load() is not None
+
+
+def test_changed_inputs_make_the_snapshot_stale(stored, monkeypatch):
+    catalog, boundary_dir, load = stored
+    touch(next(boundary_dir.glob("*.shp")))
+    assert load() is None
+
+    shutil.rmtree(boundary_dir)
+    shutil.copytree(BOUNDARY_DIR, boundary_dir)
+    assert load() is not None
+
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", snapshot.SNAPSHOT_VERSION + 1)
+    assert load() is None
+
+
+def test_new_year_is_picked_up_by_a_rebuild(stored):
+    catalog, _, load = stored
+    shutil.copy2(RAW_FILES[0], catalog.raw_dir / RAW_FILES[0].name)
+    assert load() is None
+
+    catalog.refresh(max_workers=1)
+    assert load() is None
+    snapshot.build(catalog)
+    assert load()["year"] == catalog.years[0]
@@ -0,0 +1,52 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+
+from bremen.spatial import KEY_COLUMNS, TerritoryLocator, lookup_parallel
+
+
+@pytest.fixture(scope="module")
+def cache_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("cache")
+
+
+def random_points(territories, n=5_000, seed=0):
+    """Points over the bounding box of ``territories`` and a margin around it."""
+    x0, y0, x1, y1 = territories.total_bounds
+    rng = np.random.default_rng(seed)
+    return rng.uniform(x0 - 1_000, x1 + 1_000, n), rng.uniform(y0 - 1_000, y1 + 1_000, n)
+
+
+@pytest.mark.parametrize("level", KEY_COLUMNS)
+def test_lookup_agrees_with_sjoin(level, cache_dir):
+    locator = TerritoryLocator(level, cache_dir=cache_dir)
+    territories = locator.territories
+    x, y = random_points(territories)
+
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(x, y), crs=territories.crs)
+    joined = gpd.sjoin(points, territories, predicate="within", how="left")
+    # random points do not fall on borders, so there is one territory per point
+    assert joined.index.is_unique
+    expected = [key if isinstance(key, str) else None for key in joined["territory_key"]]
+
+    keys = locator.lookup(x, y).tolist()
+    assert None in expected and keys == expected
+
+
+def test_bremerhaven_keys(cache_dir):
+    locator = TerritoryLocator("Stadtteil", cache_dir=cache_dir)
+    bremerhaven = locator.territories.query("city == 'BHV'")
+    point = bremerhaven.geometry.iloc[0].representative_point()
+
+    (key,) = locator.lookup([point.x], [point.y])
+    assert key == bremerhaven["territory_key"].iloc[0] and key.startswith("04012")
+
+
+def test_lookup_parallel_matches_lookup(cache_dir):
+    locator = TerritoryLocator("Ortsteil", cache_dir=cache_dir)
+    x, y = random_points(locator.territories, n=2_000)
+
+    chunked = lookup_parallel(
+        "Ortsteil", x, y, max_workers=2, chunk_size=500, cache_dir=cache_dir
+    )
+    assert chunked.tolist() == locator.lookup(x, y).tolist()
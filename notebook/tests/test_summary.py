@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bremen.medians import median_age_groups
+from bremen.schema import COUNT_COLUMNS
+from bremen.summary import SHARES, with_percentages
+
+from baseline import determine_median
+
+SELECTIONS = [
+    "Stadt Bremen",
+    "Mitte (Stadtteil)",
+    "Blumenthal (Ortsteil)",
+    "Nord (Stadtbezirk)",
+]
+
+
+@pytest.fixture(scope="module")
+def summary(catalog):
+    return catalog.load_summary()
+
+
+def expected_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Totals, shares and medians of one year computed like the notebook."""
+    rows = df[df["age_group"] != "Insgesamt"]
+    records = {}
+    for unit, group in rows.groupby("territorial_unit", sort=False):
+        totals = group[COUNT_COLUMNS].sum()
+        records[unit] = {
+            **totals,
+            **{
+                name: 100 / totals[denominator] * totals[numerator]
+                for name, (numerator, denominator) in SHARES.items()
+            },
+            **{
+                f"median_{column}": determine_median(group[column], group["age_group"])
+                for column in COUNT_COLUMNS
+            },
+        }
+    return pd.DataFrame.from_dict(records, orient="index")
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")  # shares of empty territories
+def test_summary_matches_the_notebook(summary, baseline_years):
+    for year, df in baseline_years.items():
+        expected = expected_summary(df)
+        actual = summary.loc[year].loc[expected.index]
+
+        for column in COUNT_COLUMNS:
+            assert (actual[column].to_numpy() == expected[column].to_numpy()).all()
+            median = f"median_{column}"
+            assert actual[median].astype(str).tolist() == expected[median].tolist()
+        for column in SHARES:
+            np.testing.assert_allclose(actual[column], expected[column], equal_nan=True)
+
+
+def test_median_age_groups_of_an_empty_territory_fall_back_to_the_first_group():
+    df = pd.DataFrame(
+        {
+            "territorial_unit": ["a"] * 3 + ["b"] * 3,
+            "age_group": ["unter 3", "3 - 6", "Insgesamt"] * 2,
+            "population_total": [1, 2, 3, 0, 0, 0],
+        }
+    )
+    medians = median_age_groups(df, ["population_total"])
+    assert medians["population_total"].to_dict() == {"a": "3 - 6", "b": "unter 3"}
+
+
+
+@pytest.fixture(scope="module")
+def panel_rows(catalog):
+    panel = catalog.load_panel()
+    return panel[panel["age_group"] != "Insgesamt"]
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")  # shares of empty territories
+def test_grouped_percentages_match_the_notebook(panel_rows, baseline_years):
+    rows = with_percentages(panel_rows, by=["year", "territorial_unit"])
+
+    for year, df in baseline_years.items():
+        df = df[df["age_group"] != "Insgesamt"]
+        for unit in SELECTIONS:
+            selected = rows[(rows["year"] == year) & (rows["territorial_unit"] == unit)]
+            expected = df[df["territorial_unit"] == unit]
+            for column in COUNT_COLUMNS:
+                share = 100 / expected[column].sum() * expected[column]
+                np.testing.assert_allclose(selected[f"percentage_{column}"], share)
+
+
+def test_grouped_percentages_match_single_selections(panel_rows):
+    rows = with_percentages(panel_rows, by=["year", "territorial_unit"])
+
+    for unit in SELECTIONS:
+        selection = panel_rows[
+            (panel_rows["year"] == "2023") & (panel_rows["territorial_unit"] == unit)
+        ]
+        expected = rows.loc[selection.index]
+        pd.testing.assert_frame_equal(with_percentages(selection), expected)
+
+
+def test_percentages_of_a_group_without_counts_are_nan():
+    counts = {column: [1, 3, 0, 0] for column in COUNT_COLUMNS}
+    rows = pd.DataFrame({"territorial_unit": ["a", "a", "b", "b"], **counts})
+    shares = with_percentages(rows, by="territorial_unit")["percentage_population_total"]
+    assert shares.iloc[:2].tolist() == [25, 75] and shares.iloc[2:].isna().all()
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+import shapely
+
+from bremen import topology
+from bremen.geometry import layers, load_layer
+
+POLYGON_LAYERS = [
+    layer
+    for layer in layers()
+    if load_layer(layer).geom_type.isin(["Polygon", "MultiPolygon"]).all()
+]
+
+
+def holes(geometries) -> int:
+    union = shapely.union_all(geometries)
+    return sum(len(polygon.interiors) for polygon in getattr(union, "geoms", [union]))
+
+
+def overlap(geometries) -> float:
+    return shapely.area(geometries).sum() - shapely.union_all(geometries).area
+
+
+@pytest.mark.parametrize("layer", POLYGON_LAYERS)
+@pytest.mark.parametrize("tolerance", topology.TOLERANCES)
+def test_simplified_coverage_stays_valid(layer, tolerance):
+    source = load_layer(layer)
+    simplified = topology.simplify(source, tolerance).geometry.values
+
+    assert shapely.coverage_is_valid(simplified)
+    assert holes(simplified) == holes(shapely.coverage_clean(source.geometry.values))
+    assert overlap(simplified) == pytest.approx(0, abs=1e-3)
+
+
+@pytest.mark.parametrize("layer", POLYGON_LAYERS)
+def test_topojson_round_trip(layer):
+    gdf = topology.simplify(load_layer(layer), topology.TOLERANCES[0])
+    encoded = json.loads(json.dumps(topology.to_topojson(gdf, layer)))
+    decoded = np.array(topology.decode(encoded))
+
+    x0, y0, x1, y1 = gdf.total_bounds
+    step = max(x1 - x0, y1 - y0) / (topology.QUANTIZATION - 1)
+    assert len(decoded) == len(gdf)
+    assert shapely.is_valid(decoded).all()
+    assert (shapely.hausdorff_distance(decoded, gdf.geometry.values) <= step).all()
+    # shared arcs are decoded identically on both sides: no gaps, no overlaps
+    assert holes(decoded) == holes(gdf.geometry.values)
+    assert overlap(decoded) == pytest.approx(0, abs=1e-3)
+    properties = [g["properties"] for g in encoded["objects"][layer]["geometries"]]
+    expected = gdf.drop(columns="geometry").to_json(orient="records")
+    assert properties == json.loads(expected)
+
+
+def test_build_replaces_superseded_versions(tmp_path, monkeypatch):
+    layer = "hb_stadtteile_BRE"
+    monkeypatch.setattr(topology, "TOPOLOGY_VERSION", 1)
+    stale = topology.build(layer, 30.0, cache_dir=tmp_path)
+    unrelated = stale.with_name("unrelated.topojson")
+    unrelated.write_text("{}")
+    monkeypatch.undo()
+
+    rebuilt = topology.build(layer, 30.0, cache_dir=tmp_path)
+    assert rebuilt != stale and rebuilt.exists() and not stale.exists()
+    assert unrelated.exists()
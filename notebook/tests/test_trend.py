@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bremen.trend import TREND_MEASURES, trends
+
+UNITS = ["Stadt Bremen", "Mitte (Stadtteil)", "Blumenthal (Ortsteil)"]
+NUMERIC = ["population_total", "foreigner_total", "percentage_foreigner"]
+
+
+@pytest.fixture(scope="module")
+def summary(catalog):
+    return catalog.load_summary()
+
+
+def test_changes_match_the_previous_available_year(summary):
+    table = trends(summary)
+    assert len(table) == len(summary)
+
+    for unit in UNITS:
+        rows = summary.xs(unit, level="territorial_unit").sort_index()
+        years = rows.index.tolist()
+        first = table.loc[(unit, years[0])]
+        assert np.isnan(first["population_total_change"])
+        assert pd.isna(first["previous_year"])
+
+        for previous, year in zip(years, years[1:]):
+            trend = table.loc[(unit, year)]
+            assert trend["previous_year"] == previous
+            for measure in NUMERIC:
+                change = rows.loc[year, measure] - rows.loc[previous, measure]
+                assert trend[f"{measure}_change"] == pytest.approx(change)
+                assert trend[f"{measure}_change_pct"] == pytest.approx(
+                    100 * change / rows.loc[previous, measure]
+                )
+
+
+def test_median_moves_by_age_groups_and_zero_counts_have_no_percentage():
+    groups = pd.CategoricalDtype(["unter 3", "3 - 6", "6 - 10"], ordered=True)
+    summary = pd.DataFrame(
+        {
+            "year": ["2020", "2021", "2020", "2021"],
+            "territorial_unit": ["a", "a", "b", "b"],
+            "population_total": [10, 15, 0, 4],
+            "median_population_total": pd.Categorical(
+                ["unter 3", "6 - 10", None, "3 - 6"], dtype=groups
+            ),
+        }
+    ).set_index(["year", "territorial_unit"])
+
+    table = trends(summary, measures=["population_total", "median_population_total"])
+
+    assert table.loc[("a", "2021"), "population_total_change_pct"] == 50
+    assert table.loc[("a", "2021"), "median_population_total_change"] == 2
+    assert table.loc[("b", "2021"), "population_total_change"] == 4
+    assert np.isnan(table.loc[("b", "2021"), "population_total_change_pct"])
+    assert np.isnan(table.loc[("b", "2021"), "median_population_total_change"])
+    assert "median_population_total_change_pct" not in table
+
+
+def test_default_measures(summary):
+    table = trends(summary)
+    assert {f"{measure}_change" for measure in TREND_MEASURES} <= set(table.columns)